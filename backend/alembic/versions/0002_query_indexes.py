@@ -0,0 +1,63 @@
+"""query indexes
+
+Indexes for the filters and orderings the routers run on every request, and a
+unique constraint on (user_id, course_id) enrollments.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 20:48:30.827791
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_bookings_user_id_scheduled_at', 'bookings', ['user_id', 'scheduled_at']),
+    ('ix_bookings_mentor_id_scheduled_at', 'bookings', ['mentor_id', 'scheduled_at']),
+    ('ix_bookings_created_at_id', 'bookings', ['created_at', 'id']),
+    ('ix_community_posts_group_id_created_at_id', 'community_posts', ['group_id', 'created_at', 'id']),
+    ('ix_community_posts_created_at_id', 'community_posts', ['created_at', 'id']),
+    ('ix_community_replies_post_id_created_at_id', 'community_replies', ['post_id', 'created_at', 'id']),
+    ('ix_course_enrollments_course_id', 'course_enrollments', ['course_id']),
+    ('ix_courses_is_published_created_at_id', 'courses', ['is_published', 'created_at', 'id']),
+    ('ix_courses_instructor_id', 'courses', ['instructor_id']),
+    ('ix_mentor_availability_mentor_id_is_available', 'mentor_availability', ['mentor_id', 'is_available']),
+    ('ix_mentor_profiles_status', 'mentor_profiles', ['status']),
+    ('ix_users_created_at_id', 'users', ['created_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    # Keep the oldest enrollment when a user was enrolled in a course twice
+    op.execute(
+        sa.text(
+            "DELETE FROM course_enrollments WHERE id NOT IN ("
+            "SELECT MIN(id) FROM course_enrollments GROUP BY user_id, course_id)"
+        )
+    )
+    op.create_unique_constraint(
+        'uq_course_enrollments_user_id_course_id', 'course_enrollments', ['user_id', 'course_id']
+    )
+
+    # Build indexes without blocking writes on Postgres (needs autocommit)
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+    op.drop_constraint('uq_course_enrollments_user_id_course_id', 'course_enrollments', type_='unique')
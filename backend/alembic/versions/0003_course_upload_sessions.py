@@ -0,0 +1,43 @@
+"""course upload sessions
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 20:51:10.969301
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('course_upload_sessions',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(), nullable=False),
+    sa.Column('content_type', sa.String(), nullable=False),
+    sa.Column('total_size', sa.BigInteger(), nullable=False),
+    sa.Column('chunk_size', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('ACTIVE', 'COMPLETED', name='uploadstatus'), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_course_upload_sessions_course_id'), 'course_upload_sessions', ['course_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_course_upload_sessions_course_id'), table_name='course_upload_sessions')
+    op.drop_table('course_upload_sessions')
+    sa.Enum(name='uploadstatus').drop(op.get_bind(), checkfirst=True)
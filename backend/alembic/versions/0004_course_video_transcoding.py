@@ -0,0 +1,56 @@
+"""course video transcoding
+
+Queue table for the HLS transcode worker and rendition metadata on courses.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 20:55:29.879665
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('transcode_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('source_url', sa.String(), nullable=False),
+    sa.Column('status', sa.Enum('QUEUED', 'RUNNING', 'DONE', 'FAILED', name='jobstatus'), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_transcode_jobs_course_id'), 'transcode_jobs', ['course_id'], unique=False)
+    op.create_index(op.f('ix_transcode_jobs_id'), 'transcode_jobs', ['id'], unique=False)
+    op.create_index('ix_transcode_jobs_status_id', 'transcode_jobs', ['status', 'id'], unique=False)
+    op.add_column('courses', sa.Column('source_video_url', sa.String(), nullable=True))
+    video_status = sa.Enum('PROCESSING', 'READY', 'FAILED', name='videostatus')
+    video_status.create(op.get_bind(), checkfirst=True)
+    op.add_column('courses', sa.Column('video_status', video_status, nullable=True))
+    op.add_column('courses', sa.Column('video_renditions', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('courses', 'video_renditions')
+    op.drop_column('courses', 'video_status')
+    op.drop_column('courses', 'source_video_url')
+    op.drop_index('ix_transcode_jobs_status_id', table_name='transcode_jobs')
+    op.drop_index(op.f('ix_transcode_jobs_id'), table_name='transcode_jobs')
+    op.drop_index(op.f('ix_transcode_jobs_course_id'), table_name='transcode_jobs')
+    op.drop_table('transcode_jobs')
+    sa.Enum(name='jobstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='videostatus').drop(op.get_bind(), checkfirst=True)
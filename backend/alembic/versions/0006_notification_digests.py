@@ -0,0 +1,37 @@
+"""notification digests
+
+Watermarks for the digest worker and booking reminder tracking.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16 21:24:07.552190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('digest_watermarks',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('last_id', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.add_column('bookings', sa.Column('reminder_sent_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_bookings_status_scheduled_at', 'bookings', ['status', 'scheduled_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_bookings_status_scheduled_at', table_name='bookings')
+    op.drop_column('bookings', 'reminder_sent_at')
+    op.drop_table('digest_watermarks')
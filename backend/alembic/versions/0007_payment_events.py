@@ -0,0 +1,36 @@
+"""payment events
+
+Processed payment webhook events, for idempotent webhook handling.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16 21:33:51.204718
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('payment_events',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('type', sa.String(), nullable=False),
+    sa.Column('payment_intent_id', sa.String(), nullable=True),
+    sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_payment_events_payment_intent_id'), 'payment_events', ['payment_intent_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_payment_events_payment_intent_id'), table_name='payment_events')
+    op.drop_table('payment_events')
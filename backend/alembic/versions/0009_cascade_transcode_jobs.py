@@ -0,0 +1,31 @@
+"""cascade transcode jobs
+
+Delete a course's transcode jobs along with the course.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 09:12:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint('transcode_jobs_course_id_fkey', 'transcode_jobs', type_='foreignkey')
+    op.create_foreign_key(
+        'transcode_jobs_course_id_fkey', 'transcode_jobs', 'courses', ['course_id'], ['id'], ondelete='CASCADE'
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('transcode_jobs_course_id_fkey', 'transcode_jobs', type_='foreignkey')
+    op.create_foreign_key('transcode_jobs_course_id_fkey', 'transcode_jobs', 'courses', ['course_id'], ['id'])
@@ -0,0 +1,34 @@
+"""cascade course upload sessions
+
+Delete a course's resumable upload sessions along with the course.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 09:31:05.204917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint('course_upload_sessions_course_id_fkey', 'course_upload_sessions', type_='foreignkey')
+    op.create_foreign_key(
+        'course_upload_sessions_course_id_fkey', 'course_upload_sessions', 'courses',
+        ['course_id'], ['id'], ondelete='CASCADE'
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('course_upload_sessions_course_id_fkey', 'course_upload_sessions', type_='foreignkey')
+    op.create_foreign_key(
+        'course_upload_sessions_course_id_fkey', 'course_upload_sessions', 'courses', ['course_id'], ['id']
+    )
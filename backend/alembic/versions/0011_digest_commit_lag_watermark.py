@@ -0,0 +1,37 @@
+"""digest commit lag watermark
+
+Track the reply digest position as (created_at, id), so replies committed
+out of id order are not skipped.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 10:04:37.661829
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('digest_watermarks', sa.Column('last_created_at', sa.DateTime(timezone=True), nullable=True))
+    # Carry an existing position over from the replies up to the last covered id
+    op.execute(
+        "UPDATE digest_watermarks SET last_created_at = ("
+        "SELECT max(created_at) FROM community_replies WHERE community_replies.id <= digest_watermarks.last_id"
+        ") WHERE last_id > 0"
+    )
+    op.create_index('ix_community_replies_created_at_id', 'community_replies', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_community_replies_created_at_id', table_name='community_replies')
+    op.drop_column('digest_watermarks', 'last_created_at')
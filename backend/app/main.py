@@ -1,10 +1,23 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Response, status
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+import anyio
+import asyncio
+import logging
 import os
 
-from app.database import init_db
-from app.routers import auth, bookings, courses, community, admin, payments
+from app.database import engine, async_engine, SessionLocal, get_db, get_pool_status, get_head_revision, get_database_revision
+from app.routers import auth, bookings, courses, community, admin, payments, media
+from app.utils.idempotency import IDEMPOTENCY_SWEEP_INTERVAL, sweep_expired_keys
+from app.utils.metrics import REGISTRY
+from app.utils.monitoring import MetricsMiddleware, instrument_engine, monitor_event_loop_lag
+from app.utils.tracing import TracingMiddleware, flush_tracing
+from app.workers.mailer import queue_status as email_queue_status
+
+logger = logging.getLogger("talesoul")
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -22,10 +35,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount uploads directory for static file serving
+app.add_middleware(TracingMiddleware)
+# Outermost, so the timing covers every other middleware
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+# Mount public upload directories for static file serving; course videos are
+# only served through the token-checked /api/v1/courses/{id}/stream endpoint
 uploads_dir = os.getenv("UPLOAD_DIR", "/app/uploads")
 if os.path.exists(uploads_dir):
-    app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
+    for subdir in ("profile_pictures", "thumbnails", "derived"):
+        app.mount(
+            f"/uploads/{subdir}",
+            StaticFiles(directory=os.path.join(uploads_dir, subdir), check_dir=False),
+            name=f"uploads_{subdir}"
+        )
+
+# Route handlers are plain `def` functions, so FastAPI runs them (and their
+# blocking DB, bcrypt and Stripe calls) in a worker thread pool instead of on
+# the event loop. Size it so concurrent requests don't queue behind each other.
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
 
 # Include routers
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Authentication"])
@@ -34,13 +64,45 @@ app.include_router(courses.router, prefix="/api/v1/courses", tags=["Courses"])
 app.include_router(community.router, prefix="/api/v1/community", tags=["Community"])
 app.include_router(admin.router, prefix="/api/v1/admin", tags=["Admin"])
 app.include_router(payments.router, prefix="/api/v1/payments", tags=["Payments"])
+app.include_router(media.router, prefix="/api/v1/media", tags=["Media"])
+
+
+def sweep_idempotency_keys():
+    db = SessionLocal()
+    try:
+        removed = sweep_expired_keys(db)
+        if removed:
+            logger.info("Swept %s expired idempotency keys", removed)
+    finally:
+        db.close()
+
+
+async def run_idempotency_sweeper():
+    """Delete expired idempotency keys every IDEMPOTENCY_SWEEP_INTERVAL seconds"""
+    while True:
+        await asyncio.sleep(IDEMPOTENCY_SWEEP_INTERVAL)
+        try:
+            await anyio.to_thread.run_sync(sweep_idempotency_keys)
+        except Exception:
+            logger.exception("Idempotency key sweep failed")
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database on startup"""
-    init_db()
-    print("Database initialized successfully!")
+    """Configure the worker; schema changes are applied by `alembic upgrade head`"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    app.state.idempotency_sweeper = asyncio.create_task(run_idempotency_sweeper())
+    app.state.loop_lag_monitor = asyncio.create_task(monitor_event_loop_lag())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks and close pooled database connections"""
+    app.state.idempotency_sweeper.cancel()
+    app.state.loop_lag_monitor.cancel()
+    await async_engine.dispose()
+    engine.dispose()
+    await anyio.to_thread.run_sync(flush_tracing)
 
 
 @app.get("/")
@@ -52,6 +114,12 @@ async def root():
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus text format for this worker; not routed through nginx"""
+    return PlainTextResponse(REGISTRY.expose(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/api/v1/health")
 async def health_check():
     return {
@@ -59,3 +127,39 @@ async def health_check():
         "service": "talesoul-backend",
         "version": "1.0.0"
     }
+
+
+@app.get("/api/v1/health/db")
+async def database_health_check():
+    """Connection pool usage and checkout wait times for this worker"""
+    return {
+        "status": "ok",
+        "pools": {
+            "sync": get_pool_status(engine.pool),
+            "async": get_pool_status(async_engine.pool),
+        }
+    }
+
+
+@app.get("/api/v1/health/email")
+def email_queue_health_check(db: Session = Depends(get_db)):
+    """Outbound email queue depth and delivery rate across all mailer workers"""
+    return {"status": "ok", "queue": email_queue_status(db)}
+
+
+@app.get("/api/v1/health/ready")
+async def readiness_check(response: Response):
+    """Ready once the database schema is at the revision this build expects"""
+    expected = get_head_revision()
+    try:
+        current = await get_database_revision()
+    except (DBAPIError, OSError) as exc:
+        logger.warning("Readiness check could not reach the database: %s", exc)
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "database unavailable", "expected_revision": expected}
+
+    if current != expected:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "migration pending", "schema_revision": current, "expected_revision": expected}
+
+    return {"status": "ready", "schema_revision": current}
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, Float, DateTime, ForeignKey, Text, Enum as SQLEnum
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String, Float, DateTime, ForeignKey, Text, Enum as SQLEnum, Index, JSON, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -26,8 +26,29 @@ class BookingStatus(str, enum.Enum):
     CANCELLED = "cancelled"
 
 
+class UploadStatus(str, enum.Enum):
+    ACTIVE = "active"
+    COMPLETED = "completed"
+
+
+class VideoStatus(str, enum.Enum):
+    PROCESSING = "processing"
+    READY = "ready"
+    FAILED = "failed"
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
@@ -51,6 +72,9 @@ class User(Base):
 
 class MentorProfile(Base):
     __tablename__ = "mentor_profiles"
+    __table_args__ = (
+        Index("ix_mentor_profiles_status", "status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
@@ -71,6 +95,9 @@ class MentorProfile(Base):
 
 class MentorAvailability(Base):
     __tablename__ = "mentor_availability"
+    __table_args__ = (
+        Index("ix_mentor_availability_mentor_id_is_available", "mentor_id", "is_available"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     mentor_id = Column(Integer, ForeignKey("mentor_profiles.id"), nullable=False)
@@ -86,6 +113,12 @@ class MentorAvailability(Base):
 
 class Booking(Base):
     __tablename__ = "bookings"
+    __table_args__ = (
+        Index("ix_bookings_user_id_scheduled_at", "user_id", "scheduled_at"),
+        Index("ix_bookings_mentor_id_scheduled_at", "mentor_id", "scheduled_at"),
+        Index("ix_bookings_created_at_id", "created_at", "id"),
+        Index("ix_bookings_status_scheduled_at", "status", "scheduled_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -97,6 +130,7 @@ class Booking(Base):
     notes = Column(Text, nullable=True)
     price = Column(Float, nullable=False)
     payment_id = Column(String, nullable=True)  # Stripe/Razorpay payment ID
+    reminder_sent_at = Column(DateTime(timezone=True), nullable=True)  # Set by the digest worker
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -107,12 +141,19 @@ class Booking(Base):
 
 class Course(Base):
     __tablename__ = "courses"
+    __table_args__ = (
+        Index("ix_courses_is_published_created_at_id", "is_published", "created_at", "id"),
+        Index("ix_courses_instructor_id", "instructor_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     instructor_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
-    video_url = Column(String, nullable=True)  # Path to uploaded video file
+    video_url = Column(String, nullable=True)  # HLS master playlist once transcoded, else the original
+    source_video_url = Column(String, nullable=True)  # Original upload, input to transcoding
+    video_status = Column(SQLEnum(VideoStatus), nullable=True)
+    video_renditions = Column(JSON, nullable=True)  # [{"name", "height", "bandwidth", "playlist"}]
     thumbnail_url = Column(String, nullable=True)
     price = Column(Float, nullable=False)
     duration_minutes = Column(Integer, nullable=True)
@@ -127,6 +168,10 @@ class Course(Base):
 
 class CourseEnrollment(Base):
     __tablename__ = "course_enrollments"
+    __table_args__ = (
+        UniqueConstraint("user_id", "course_id", name="uq_course_enrollments_user_id_course_id"),
+        Index("ix_course_enrollments_course_id", "course_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -141,6 +186,102 @@ class CourseEnrollment(Base):
     course = relationship("Course", back_populates="enrollments")
 
 
+class CourseUploadSession(Base):
+    """Resumable video upload; chunks live on disk until the session is completed"""
+    __tablename__ = "course_upload_sessions"
+
+    id = Column(String, primary_key=True)  # Random hex token, also the chunk directory name
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=False)
+    total_size = Column(BigInteger, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    status = Column(SQLEnum(UploadStatus), default=UploadStatus.ACTIVE, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    @property
+    def total_chunks(self) -> int:
+        return -(-self.total_size // self.chunk_size)
+
+
+class TranscodeJob(Base):
+    """Queued HLS transcode of a course video; claimed by app.workers.transcode"""
+    __tablename__ = "transcode_jobs"
+    __table_args__ = (
+        Index("ix_transcode_jobs_status_id", "status", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False, index=True)
+    source_url = Column(String, nullable=False)
+    status = Column(SQLEnum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class OutboundEmail(Base):
+    """Queued outgoing email; delivered by app.workers.mailer"""
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+        Index("ix_email_outbox_sent_at", "sent_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_emails = Column(JSON, nullable=False)
+    subject = Column(String, nullable=False)
+    html_content = Column(Text, nullable=False)
+    text_content = Column(Text, nullable=True)
+    status = Column(SQLEnum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class PaymentEvent(Base):
+    """Payment provider webhook event, recorded once by its event id"""
+    __tablename__ = "payment_events"
+
+    id = Column(String, primary_key=True)  # Provider event id, e.g. Stripe's evt_...
+    type = Column(String, nullable=False)
+    payment_intent_id = Column(String, nullable=True, index=True)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class IdempotencyKey(Base):
+    """Stored response for a client-supplied Idempotency-Key; see app.utils.idempotency"""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    key = Column(String, primary_key=True)
+    endpoint = Column(String, nullable=False)
+    request_hash = Column(String, nullable=False)
+    response = Column(JSON, nullable=True)  # Null while the first request is still running
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class DigestWatermark(Base):
+    """(created_at, id) of the last row already covered by a digest; see app.workers.digest"""
+    __tablename__ = "digest_watermarks"
+
+    name = Column(String, primary_key=True)
+    last_created_at = Column(DateTime(timezone=True), nullable=True)  # None: nothing covered yet
+    last_id = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class CommunityGroup(Base):
     __tablename__ = "community_groups"
 
@@ -156,6 +297,10 @@ class CommunityGroup(Base):
 
 class CommunityPost(Base):
     __tablename__ = "community_posts"
+    __table_args__ = (
+        Index("ix_community_posts_group_id_created_at_id", "group_id", "created_at", "id"),
+        Index("ix_community_posts_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     group_id = Column(Integer, ForeignKey("community_groups.id"), nullable=False)
@@ -173,6 +318,10 @@ class CommunityPost(Base):
 
 class CommunityReply(Base):
     __tablename__ = "community_replies"
+    __table_args__ = (
+        Index("ix_community_replies_post_id_created_at_id", "post_id", "created_at", "id"),
+        Index("ix_community_replies_created_at_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     post_id = Column(Integer, ForeignKey("community_posts.id"), nullable=False)
@@ -1,20 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional, Union
 
-from app.database import get_db
+from app.database import AsyncSessionLocal, get_db
 from app.models import User, MentorProfile, MentorStatus, UserRole, Booking, Course
 from app.schemas import (
     MentorProfileResponse, MentorApproval, MessageResponse,
-    UserResponse, BookingResponse, CourseResponse
+    UserResponse, BookingResponse, CourseResponse, Page
 )
-from app.routers.auth import get_current_active_user
+from app.routers.auth import (
+    get_current_active_user, get_current_active_user_async, invalidate_cached_user, oauth2_scheme
+)
+from app.routers.courses import delete_course_with_uploads
+from app.utils.pagination import MAX_PAGE_SIZE, paginate_keyset, build_page
+from app.utils.profiler import ProfilerBusy, format_collapsed, sample_stacks
 
 router = APIRouter()
 
 
 # ===== Admin Authorization =====
-async def get_admin_user(current_user: User = Depends(get_current_active_user)):
+def get_admin_user(current_user: User = Depends(get_current_active_user)):
     """Verify that current user is an admin"""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -26,14 +33,16 @@ async def get_admin_user(current_user: User = Depends(get_current_active_user)):
 
 # ===== Mentor Approval Routes =====
 @router.get("/pending-mentors", response_model=List[MentorProfileResponse])
-async def list_pending_mentors(
-    skip: int = 0,
-    limit: int = 100,
+def list_pending_mentors(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Get list of mentors pending approval (admin only)"""
-    pending_mentors = db.query(MentorProfile).filter(
+    pending_mentors = db.query(MentorProfile).options(
+        selectinload(MentorProfile.user)
+    ).filter(
         MentorProfile.status == MentorStatus.PENDING
     ).offset(skip).limit(limit).all()
 
@@ -41,7 +50,7 @@ async def list_pending_mentors(
 
 
 @router.post("/approve-mentor", response_model=MentorProfileResponse)
-async def approve_or_reject_mentor(
+def approve_or_reject_mentor(
     approval_data: MentorApproval,
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
@@ -70,15 +79,15 @@ async def approve_or_reject_mentor(
 
 
 @router.get("/mentors", response_model=List[MentorProfileResponse])
-async def list_all_mentors(
-    skip: int = 0,
-    limit: int = 100,
+def list_all_mentors(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     status_filter: MentorStatus = None,
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Get list of all mentors with optional status filter (admin only)"""
-    query = db.query(MentorProfile)
+    query = db.query(MentorProfile).options(selectinload(MentorProfile.user))
 
     if status_filter:
         query = query.filter(MentorProfile.status == status_filter)
@@ -88,26 +97,30 @@ async def list_all_mentors(
 
 
 # ===== User Management Routes =====
-@router.get("/users", response_model=List[UserResponse])
-async def list_all_users(
-    skip: int = 0,
-    limit: int = 100,
+@router.get("/users", response_model=Union[List[UserResponse], Page[UserResponse]])
+def list_all_users(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     role_filter: UserRole = None,
+    cursor: Optional[str] = None,
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Get list of all users (admin only)"""
+    """Get list of all users (admin only, pass `cursor` for a cursor-paginated page)"""
     query = db.query(User)
 
     if role_filter:
         query = query.filter(User.role == role_filter)
 
+    if cursor is not None:
+        return build_page(paginate_keyset(query, User, cursor, limit).all(), limit)
+
     users = query.offset(skip).limit(limit).all()
     return users
 
 
 @router.get("/users/{user_id}", response_model=UserResponse)
-async def get_user_by_id(
+def get_user_by_id(
     user_id: int,
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
@@ -125,7 +138,7 @@ async def get_user_by_id(
 
 
 @router.patch("/users/{user_id}/deactivate", response_model=MessageResponse)
-async def deactivate_user(
+def deactivate_user(
     user_id: int,
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
@@ -141,12 +154,13 @@ async def deactivate_user(
 
     user.is_active = False
     db.commit()
+    invalidate_cached_user(user.id)
 
     return MessageResponse(message="User deactivated successfully")
 
 
 @router.patch("/users/{user_id}/activate", response_model=MessageResponse)
-async def activate_user(
+def activate_user(
     user_id: int,
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
@@ -162,12 +176,13 @@ async def activate_user(
 
     user.is_active = True
     db.commit()
+    invalidate_cached_user(user.id)
 
     return MessageResponse(message="User activated successfully")
 
 
 @router.patch("/users/{user_id}/role", response_model=UserResponse)
-async def change_user_role(
+def change_user_role(
     user_id: int,
     new_role: UserRole,
     admin_user: User = Depends(get_admin_user),
@@ -185,13 +200,14 @@ async def change_user_role(
     user.role = new_role
     db.commit()
     db.refresh(user)
+    invalidate_cached_user(user.id)
 
     return user
 
 
 # ===== Statistics Routes =====
 @router.get("/stats")
-async def get_platform_statistics(
+def get_platform_statistics(
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
@@ -218,14 +234,18 @@ async def get_platform_statistics(
 
 
 # ===== Content Management Routes =====
-@router.get("/bookings", response_model=List[BookingResponse])
-async def list_all_bookings(
-    skip: int = 0,
-    limit: int = 100,
+@router.get("/bookings", response_model=Union[List[BookingResponse], Page[BookingResponse]])
+def list_all_bookings(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Get list of all bookings (admin only)"""
+    """Get list of all bookings (admin only, pass `cursor` for a cursor-paginated page)"""
+    if cursor is not None:
+        return build_page(paginate_keyset(db.query(Booking), Booking, cursor, limit).all(), limit)
+
     bookings = db.query(Booking).order_by(
         Booking.created_at.desc()
     ).offset(skip).limit(limit).all()
@@ -234,19 +254,21 @@ async def list_all_bookings(
 
 
 @router.get("/courses", response_model=List[CourseResponse])
-async def list_all_courses(
-    skip: int = 0,
-    limit: int = 100,
+def list_all_courses(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
     """Get list of all courses (admin only)"""
-    courses = db.query(Course).offset(skip).limit(limit).all()
+    courses = db.query(Course).options(
+        selectinload(Course.instructor)
+    ).offset(skip).limit(limit).all()
     return courses
 
 
 @router.delete("/courses/{course_id}", response_model=MessageResponse)
-async def delete_course_admin(
+def delete_course_admin(
     course_id: int,
     admin_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
@@ -260,7 +282,35 @@ async def delete_course_admin(
             detail="Course not found"
         )
 
-    db.delete(course)
-    db.commit()
+    delete_course_with_uploads(db, course)
 
     return MessageResponse(message="Course deleted successfully")
+
+
+# ===== Diagnostics =====
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile_worker(
+    seconds: float = Query(10, gt=0, le=60),
+    interval_ms: float = Query(10, ge=1, le=1000),
+    idle: bool = False,
+    token: str = Depends(oauth2_scheme)
+):
+    """Sample this worker's threads and return collapsed stacks (admin only)
+
+    Feed the output to flamegraph.pl or speedscope. Only the worker that
+    serves the request is profiled; idle threads are left out unless
+    `idle=true`.
+    """
+    # Check the caller on a session of its own, closed before sampling, so a
+    # pooled connection isn't held for up to a minute
+    async with AsyncSessionLocal() as db:
+        get_admin_user(await get_current_active_user_async(token, db))
+
+    try:
+        counts = await anyio.to_thread.run_sync(sample_stacks, seconds, interval_ms / 1000, idle)
+    except ProfilerBusy:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running on this worker"
+        )
+    return PlainTextResponse(format_collapsed(counts))
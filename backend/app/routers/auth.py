@@ -6,20 +6,36 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models import User, UserRole, MentorProfile, MentorStatus
 from app.schemas import (
     UserCreate, UserResponse, UserLogin, Token, TokenData,
     MentorProfileCreate, MentorProfileResponse, MessageResponse
 )
+from app.utils.cache import create_cache
+from app.utils.images import is_valid_image, generate_derivatives
+from app.utils.monitoring import allow_sql_profile
+from app.utils.uploads import save_upload, upload_extension, MAX_IMAGE_UPLOAD_BYTES
 
 # Configuration
 SECRET_KEY = os.getenv("SECRET_KEY", "your-super-secret-key-change-this-in-production")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Authenticated users are cached by id so requests don't reload them on every
+# call. The memory backend is per worker: other workers see admin changes
+# after USER_CACHE_TTL seconds. Use the redis backend to share invalidations.
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", "60"))
+user_cache = create_cache(
+    os.getenv("USER_CACHE_BACKEND", "memory"),
+    prefix="talesoul:user:",
+    maxsize=int(os.getenv("USER_CACHE_MAXSIZE", "10000")),
+    redis_url=os.getenv("REDIS_URL")
+)
+
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -53,6 +69,41 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+def serialize_cached_user(user: User) -> dict:
+    """Convert a user into the JSON-safe dict stored in the user cache"""
+    return {
+        "id": user.id,
+        "email": user.email,
+        "full_name": user.full_name,
+        "role": user.role.value,
+        "is_active": user.is_active,
+        "profile_picture": user.profile_picture,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "updated_at": user.updated_at.isoformat() if user.updated_at else None,
+    }
+
+
+def deserialize_cached_user(data: dict) -> User:
+    """Rebuild a detached user from the cache (columns not cached load on access)"""
+    user = User(
+        id=data["id"],
+        email=data["email"],
+        full_name=data["full_name"],
+        role=UserRole(data["role"]),
+        is_active=data["is_active"],
+        profile_picture=data["profile_picture"],
+        created_at=datetime.fromisoformat(data["created_at"]) if data["created_at"] else None,
+        updated_at=datetime.fromisoformat(data["updated_at"]) if data["updated_at"] else None,
+    )
+    make_transient_to_detached(user)
+    return user
+
+
+def invalidate_cached_user(user_id: int):
+    """Drop a user from the cache after writing to their row"""
+    user_cache.delete(str(user_id))
+
+
 def authenticate_user(db: Session, email: str, password: str):
     """Authenticate a user by email and password"""
     user = db.query(User).filter(User.email == email).first()
@@ -63,40 +114,74 @@ def authenticate_user(db: Session, email: str, password: str):
     return user
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Get the current authenticated user from JWT token"""
-    credentials_exception = HTTPException(
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def decode_access_token(token: str) -> TokenData:
+    """Validate a JWT and return its claims; raises 401 if it is invalid"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         user_id: int = payload.get("user_id")
         role: str = payload.get("role")
         if email is None or user_id is None:
-            raise credentials_exception
-        token_data = TokenData(email=email, user_id=user_id, role=role)
+            raise credentials_exception()
+        return TokenData(email=email, user_id=user_id, role=role)
     except JWTError:
-        raise credentials_exception
+        raise credentials_exception()
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """Get the current authenticated user from JWT token"""
+    token_data = decode_access_token(token)
+
+    # Cache hit: attach the cached user to this session without a query, so
+    # handlers can still modify and commit it
+    cached_user = user_cache.get(str(token_data.user_id))
+    if cached_user is not None:
+        return db.merge(deserialize_cached_user(cached_user), load=False)
 
     user = db.query(User).filter(User.id == token_data.user_id).first()
     if user is None:
-        raise credentials_exception
+        raise credentials_exception()
+
+    user_cache.set(str(user.id), serialize_cached_user(user), USER_CACHE_TTL)
     return user
 
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)):
+def get_current_active_user(current_user: User = Depends(get_current_user)):
     """Get the current active user"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    allow_sql_profile(current_user.role == UserRole.ADMIN)
     return current_user
 
 
+async def get_current_active_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """get_current_active_user for async handlers
+
+    Loads the user on the request's AsyncSession (the one the handler also
+    receives), so no sync pool connection is held while the handler awaits.
+    Skips the user cache, whose redis backend would block the event loop.
+    """
+    token_data = decode_access_token(token)
+    user = await db.get(User, token_data.user_id)
+    if user is None:
+        raise credentials_exception()
+    return get_current_active_user(user)
+
+
 # ===== Routes =====
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
     # Check if user already exists
     existing_user = db.query(User).filter(User.email == user_data.email).first()
@@ -123,7 +208,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """Login and get access token"""
     user = authenticate_user(db, form_data.username, form_data.password)
     if not user:
@@ -147,13 +232,13 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_active_user)):
+def get_me(current_user: User = Depends(get_current_active_user)):
     """Get current user profile"""
     return current_user
 
 
 @router.post("/mentor/apply", response_model=MentorProfileResponse, status_code=status.HTTP_201_CREATED)
-async def apply_as_mentor(
+def apply_as_mentor(
     mentor_data: MentorProfileCreate,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -189,12 +274,13 @@ async def apply_as_mentor(
 
     db.commit()
     db.refresh(mentor_profile)
+    invalidate_cached_user(current_user.id)
 
     return mentor_profile
 
 
 @router.get("/mentor/profile", response_model=MentorProfileResponse)
-async def get_my_mentor_profile(
+def get_my_mentor_profile(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -213,7 +299,7 @@ async def get_my_mentor_profile(
 
 
 @router.post("/upload-profile-picture", response_model=MessageResponse)
-async def upload_profile_picture(
+def upload_profile_picture(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -227,21 +313,23 @@ async def upload_profile_picture(
             detail="Only JPEG and PNG images are allowed"
         )
 
-    # Save file
-    upload_dir = os.getenv("UPLOAD_DIR", "/app/uploads")
-    os.makedirs(f"{upload_dir}/profile_pictures", exist_ok=True)
+    if not is_valid_image(file.file):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Image cannot be decoded"
+        )
 
-    file_extension = file.filename.split(".")[-1]
-    filename = f"user_{current_user.id}.{file_extension}"
-    file_path = f"{upload_dir}/profile_pictures/{filename}"
+    # Save file under its content hash
+    file_extension = upload_extension(file.filename, "jpg")
+    stored = save_upload(file, "profile_pictures", file_extension, max_bytes=MAX_IMAGE_UPLOAD_BYTES)
 
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # Pre-render the avatar sizes the mentor list and community pages request
+    generate_derivatives(stored.url, "profile_pictures", stored.sha256)
 
     # Update user profile picture URL
-    current_user.profile_picture = f"/uploads/profile_pictures/{filename}"
+    current_user.profile_picture = stored.url
     db.commit()
+    invalidate_cached_user(current_user.id)
 
     return MessageResponse(
         message="Profile picture uploaded successfully",
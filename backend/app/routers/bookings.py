@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 from typing import List
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models import (
     User, MentorProfile, MentorAvailability, Booking,
     BookingStatus, MentorStatus, UserRole
@@ -13,6 +15,7 @@ from app.schemas import (
     MentorProfileResponse, MessageResponse
 )
 from app.routers.auth import get_current_active_user
+from app.utils.pagination import MAX_PAGE_SIZE
 
 router = APIRouter()
 
@@ -20,20 +23,22 @@ router = APIRouter()
 # ===== Mentor Routes =====
 @router.get("/mentors", response_model=List[MentorProfileResponse])
 async def list_approved_mentors(
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get list of approved mentors"""
-    mentors = db.query(MentorProfile).filter(
-        MentorProfile.status == MentorStatus.APPROVED
-    ).offset(skip).limit(limit).all()
+    result = await db.execute(
+        select(MentorProfile).options(selectinload(MentorProfile.user)).where(
+            MentorProfile.status == MentorStatus.APPROVED
+        ).offset(skip).limit(limit)
+    )
 
-    return mentors
+    return result.scalars().all()
 
 
 @router.get("/mentors/{mentor_id}", response_model=MentorProfileResponse)
-async def get_mentor_profile(mentor_id: int, db: Session = Depends(get_db)):
+def get_mentor_profile(mentor_id: int, db: Session = Depends(get_db)):
     """Get specific mentor profile by ID"""
     mentor = db.query(MentorProfile).filter(
         MentorProfile.id == mentor_id,
@@ -51,7 +56,7 @@ async def get_mentor_profile(mentor_id: int, db: Session = Depends(get_db)):
 
 # ===== Availability Routes =====
 @router.post("/availability", response_model=AvailabilitySlotResponse, status_code=status.HTTP_201_CREATED)
-async def create_availability_slot(
+def create_availability_slot(
     slot_data: AvailabilitySlotCreate,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -85,7 +90,7 @@ async def create_availability_slot(
 
 
 @router.get("/availability/{mentor_id}", response_model=List[AvailabilitySlotResponse])
-async def get_mentor_availability(mentor_id: int, db: Session = Depends(get_db)):
+def get_mentor_availability(mentor_id: int, db: Session = Depends(get_db)):
     """Get mentor's availability slots"""
     mentor = db.query(MentorProfile).filter(MentorProfile.id == mentor_id).first()
     if not mentor:
@@ -103,7 +108,7 @@ async def get_mentor_availability(mentor_id: int, db: Session = Depends(get_db))
 
 
 @router.delete("/availability/{slot_id}", response_model=MessageResponse)
-async def delete_availability_slot(
+def delete_availability_slot(
     slot_id: int,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -140,7 +145,7 @@ async def delete_availability_slot(
 
 # ===== Booking Routes =====
 @router.post("/book", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
-async def create_booking(
+def create_booking(
     booking_data: BookingCreate,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -188,7 +193,7 @@ async def create_booking(
 
 
 @router.get("/my-bookings", response_model=List[BookingResponse])
-async def get_my_bookings(
+def get_my_bookings(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -201,7 +206,7 @@ async def get_my_bookings(
 
 
 @router.get("/mentor-bookings", response_model=List[BookingResponse])
-async def get_mentor_bookings(
+def get_mentor_bookings(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -225,7 +230,7 @@ async def get_mentor_bookings(
 
 
 @router.get("/{booking_id}", response_model=BookingResponse)
-async def get_booking(
+def get_booking(
     booking_id: int,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -250,7 +255,7 @@ async def get_booking(
 
 
 @router.patch("/{booking_id}", response_model=BookingResponse)
-async def update_booking(
+def update_booking(
     booking_id: int,
     booking_update: BookingUpdate,
     current_user: User = Depends(get_current_active_user),
@@ -287,7 +292,7 @@ async def update_booking(
 
 
 @router.delete("/{booking_id}", response_model=MessageResponse)
-async def cancel_booking(
+def cancel_booking(
     booking_id: int,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -1,23 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional, Union
 
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.models import User, CommunityGroup, CommunityPost, CommunityReply
 from app.schemas import (
     CommunityGroupCreate, CommunityGroupResponse,
     CommunityPostCreate, CommunityPostUpdate, CommunityPostResponse,
     CommunityReplyCreate, CommunityReplyResponse,
-    MessageResponse
+    MessageResponse, Page
 )
 from app.routers.auth import get_current_active_user
+from app.utils.pagination import MAX_PAGE_SIZE, paginate_keyset, build_page
 
 router = APIRouter()
 
 
 # ===== Group Routes =====
 @router.post("/groups", response_model=CommunityGroupResponse, status_code=status.HTTP_201_CREATED)
-async def create_group(
+def create_group(
     group_data: CommunityGroupCreate,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -37,9 +40,9 @@ async def create_group(
 
 
 @router.get("/groups", response_model=List[CommunityGroupResponse])
-async def list_groups(
-    skip: int = 0,
-    limit: int = 100,
+def list_groups(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     db: Session = Depends(get_db)
 ):
     """List all public groups"""
@@ -51,7 +54,7 @@ async def list_groups(
 
 
 @router.get("/groups/{group_id}", response_model=CommunityGroupResponse)
-async def get_group(group_id: int, db: Session = Depends(get_db)):
+def get_group(group_id: int, db: Session = Depends(get_db)):
     """Get specific group by ID"""
     group = db.query(CommunityGroup).filter(CommunityGroup.id == group_id).first()
 
@@ -66,7 +69,7 @@ async def get_group(group_id: int, db: Session = Depends(get_db)):
 
 # ===== Post Routes =====
 @router.post("/posts", response_model=CommunityPostResponse, status_code=status.HTTP_201_CREATED)
-async def create_post(
+def create_post(
     post_data: CommunityPostCreate,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -95,25 +98,34 @@ async def create_post(
     return post
 
 
-@router.get("/posts", response_model=List[CommunityPostResponse])
+@router.get("/posts", response_model=Union[List[CommunityPostResponse], Page[CommunityPostResponse]])
 async def list_posts(
     group_id: int = None,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db)
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List posts (optionally filtered by group)"""
-    query = db.query(CommunityPost)
+    """List posts (optionally filtered by group).
+
+    Pass `cursor` (empty for the first page) to get a cursor-paginated page
+    instead of a plain list.
+    """
+    query = select(CommunityPost).options(selectinload(CommunityPost.author))
 
     if group_id:
-        query = query.filter(CommunityPost.group_id == group_id)
+        query = query.where(CommunityPost.group_id == group_id)
+
+    if cursor is not None:
+        result = await db.execute(paginate_keyset(query, CommunityPost, cursor, limit))
+        return build_page(result.scalars().all(), limit)
 
-    posts = query.order_by(CommunityPost.created_at.desc()).offset(skip).limit(limit).all()
-    return posts
+    result = await db.execute(query.order_by(CommunityPost.created_at.desc()).offset(skip).limit(limit))
+    return result.scalars().all()
 
 
 @router.get("/posts/{post_id}", response_model=CommunityPostResponse)
-async def get_post(post_id: int, db: Session = Depends(get_db)):
+def get_post(post_id: int, db: Session = Depends(get_db)):
     """Get specific post by ID"""
     post = db.query(CommunityPost).filter(CommunityPost.id == post_id).first()
 
@@ -127,7 +139,7 @@ async def get_post(post_id: int, db: Session = Depends(get_db)):
 
 
 @router.patch("/posts/{post_id}", response_model=CommunityPostResponse)
-async def update_post(
+def update_post(
     post_id: int,
     post_update: CommunityPostUpdate,
     current_user: User = Depends(get_current_active_user),
@@ -162,7 +174,7 @@ async def update_post(
 
 
 @router.delete("/posts/{post_id}", response_model=MessageResponse)
-async def delete_post(
+def delete_post(
     post_id: int,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -191,7 +203,7 @@ async def delete_post(
 
 # ===== Reply Routes =====
 @router.post("/replies", response_model=CommunityReplyResponse, status_code=status.HTTP_201_CREATED)
-async def create_reply(
+def create_reply(
     reply_data: CommunityReplyCreate,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -219,14 +231,15 @@ async def create_reply(
     return reply
 
 
-@router.get("/posts/{post_id}/replies", response_model=List[CommunityReplyResponse])
-async def list_post_replies(
+@router.get("/posts/{post_id}/replies", response_model=Union[List[CommunityReplyResponse], Page[CommunityReplyResponse]])
+def list_post_replies(
     post_id: int,
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get all replies for a post"""
+    """Get all replies for a post (pass `cursor` for a cursor-paginated page)"""
     # Verify post exists
     post = db.query(CommunityPost).filter(CommunityPost.id == post_id).first()
     if not post:
@@ -235,15 +248,22 @@ async def list_post_replies(
             detail="Post not found"
         )
 
-    replies = db.query(CommunityReply).filter(
+    query = db.query(CommunityReply).options(
+        selectinload(CommunityReply.author)
+    ).filter(
         CommunityReply.post_id == post_id
-    ).order_by(CommunityReply.created_at.asc()).offset(skip).limit(limit).all()
+    )
+
+    if cursor is not None:
+        return build_page(paginate_keyset(query, CommunityReply, cursor, limit, descending=False).all(), limit)
+
+    replies = query.order_by(CommunityReply.created_at.asc()).offset(skip).limit(limit).all()
 
     return replies
 
 
 @router.get("/replies/{reply_id}", response_model=CommunityReplyResponse)
-async def get_reply(reply_id: int, db: Session = Depends(get_db)):
+def get_reply(reply_id: int, db: Session = Depends(get_db)):
     """Get specific reply by ID"""
     reply = db.query(CommunityReply).filter(CommunityReply.id == reply_id).first()
 
@@ -257,7 +277,7 @@ async def get_reply(reply_id: int, db: Session = Depends(get_db)):
 
 
 @router.delete("/replies/{reply_id}", response_model=MessageResponse)
-async def delete_reply(
+def delete_reply(
     reply_id: int,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -1,23 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
-from typing import List
-import os
-
-from app.database import get_db
-from app.models import User, Course, CourseEnrollment, MentorProfile, UserRole
+import secrets
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, UploadFile, File
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional, Union
+
+from app.database import get_db, get_async_db
+from app.models import (
+    User, Course, CourseEnrollment, CourseUploadSession, MentorProfile, UserRole, UploadStatus
+)
 from app.schemas import (
     CourseCreate, CourseUpdate, CourseResponse,
     CourseEnrollmentCreate, CourseEnrollmentResponse,
-    MessageResponse
+    UploadSessionCreate, UploadSessionResponse, StreamTokenResponse,
+    MessageResponse, Page
+)
+from app.routers.auth import get_current_active_user, get_current_active_user_async
+from app.utils.pagination import MAX_PAGE_SIZE, paginate_keyset, build_page
+from app.utils.streaming import create_stream_path, verify_stream_token, resolve_granted_url, file_range_response
+from app.workers.transcode import enqueue_transcode
+from app.utils.images import is_valid_image, generate_derivatives
+from app.utils.uploads import (
+    save_upload, upload_extension, MAX_IMAGE_UPLOAD_BYTES, MAX_VIDEO_UPLOAD_BYTES,
+    create_session_dir, remove_session_dir, list_received_chunks, write_chunk, assemble_chunks
 )
-from app.routers.auth import get_current_active_user
 
 router = APIRouter()
 
+VIDEO_CONTENT_TYPES = ["video/mp4", "video/mpeg", "video/quicktime"]
+
+
+def delete_course_with_uploads(db: Session, course: Course):
+    """Delete a course and the staged chunks of its resumable uploads
+
+    The upload session and transcode job rows go with the course (ON DELETE
+    CASCADE); the chunk directories are removed once the delete is committed.
+    """
+    upload_ids = [upload_id for (upload_id,) in db.query(CourseUploadSession.id).filter(
+        CourseUploadSession.course_id == course.id
+    )]
+
+    db.delete(course)
+    db.commit()
+
+    for upload_id in upload_ids:
+        remove_session_dir(upload_id)
+
 
 # ===== Course Management Routes =====
 @router.post("/", response_model=CourseResponse, status_code=status.HTTP_201_CREATED)
-async def create_course(
+def create_course(
     course_data: CourseCreate,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -47,25 +81,30 @@ async def create_course(
     return course
 
 
-@router.get("/", response_model=List[CourseResponse])
+@router.get("/", response_model=Union[List[CourseResponse], Page[CourseResponse]])
 async def list_courses(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
     published_only: bool = True,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List all published courses"""
-    query = db.query(Course)
+    """List all published courses (pass `cursor` for a cursor-paginated page)"""
+    query = select(Course).options(selectinload(Course.instructor))
 
     if published_only:
-        query = query.filter(Course.is_published == True)
+        query = query.where(Course.is_published == True)
 
-    courses = query.offset(skip).limit(limit).all()
-    return courses
+    if cursor is not None:
+        result = await db.execute(paginate_keyset(query, Course, cursor, limit))
+        return build_page(result.scalars().all(), limit)
+
+    result = await db.execute(query.offset(skip).limit(limit))
+    return result.scalars().all()
 
 
 @router.get("/my-courses", response_model=List[CourseResponse])
-async def get_my_courses(
+def get_my_courses(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -78,7 +117,7 @@ async def get_my_courses(
 
 
 @router.get("/{course_id}", response_model=CourseResponse)
-async def get_course(course_id: int, db: Session = Depends(get_db)):
+def get_course(course_id: int, db: Session = Depends(get_db)):
     """Get specific course by ID"""
     course = db.query(Course).filter(Course.id == course_id).first()
 
@@ -99,7 +138,7 @@ async def get_course(course_id: int, db: Session = Depends(get_db)):
 
 
 @router.patch("/{course_id}", response_model=CourseResponse)
-async def update_course(
+def update_course(
     course_id: int,
     course_update: CourseUpdate,
     current_user: User = Depends(get_current_active_user),
@@ -140,7 +179,7 @@ async def update_course(
 
 
 @router.delete("/{course_id}", response_model=MessageResponse)
-async def delete_course(
+def delete_course(
     course_id: int,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -161,15 +200,14 @@ async def delete_course(
             detail="You don't have permission to delete this course"
         )
 
-    db.delete(course)
-    db.commit()
+    delete_course_with_uploads(db, course)
 
     return MessageResponse(message="Course deleted successfully")
 
 
 # ===== Video Upload Routes =====
 @router.post("/{course_id}/upload-video", response_model=MessageResponse)
-async def upload_course_video(
+def upload_course_video(
     course_id: int,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user),
@@ -192,27 +230,18 @@ async def upload_course_video(
         )
 
     # Validate file type
-    allowed_types = ["video/mp4", "video/mpeg", "video/quicktime"]
-    if file.content_type not in allowed_types:
+    if file.content_type not in VIDEO_CONTENT_TYPES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Only MP4, MPEG, and MOV video files are allowed"
         )
 
-    # Save file
-    upload_dir = os.getenv("UPLOAD_DIR", "/app/uploads")
-    os.makedirs(f"{upload_dir}/courses", exist_ok=True)
-
-    file_extension = file.filename.split(".")[-1]
-    filename = f"course_{course_id}.{file_extension}"
-    file_path = f"{upload_dir}/courses/{filename}"
-
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # Save file under its content hash
+    file_extension = upload_extension(file.filename, "mp4")
+    stored = save_upload(file, "courses", file_extension, max_bytes=MAX_VIDEO_UPLOAD_BYTES)
 
-    # Update course video URL
-    course.video_url = f"/uploads/courses/{filename}"
+    # Serve the original until the HLS renditions are ready
+    enqueue_transcode(db, course, stored.url)
     db.commit()
 
     return MessageResponse(
@@ -222,7 +251,7 @@ async def upload_course_video(
 
 
 @router.post("/{course_id}/upload-thumbnail", response_model=MessageResponse)
-async def upload_course_thumbnail(
+def upload_course_thumbnail(
     course_id: int,
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user),
@@ -252,20 +281,21 @@ async def upload_course_thumbnail(
             detail="Only JPEG and PNG images are allowed"
         )
 
-    # Save file
-    upload_dir = os.getenv("UPLOAD_DIR", "/app/uploads")
-    os.makedirs(f"{upload_dir}/thumbnails", exist_ok=True)
+    if not is_valid_image(file.file):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Image cannot be decoded"
+        )
 
-    file_extension = file.filename.split(".")[-1]
-    filename = f"course_{course_id}_thumb.{file_extension}"
-    file_path = f"{upload_dir}/thumbnails/{filename}"
+    # Save file under its content hash
+    file_extension = upload_extension(file.filename, "jpg")
+    stored = save_upload(file, "thumbnails", file_extension, max_bytes=MAX_IMAGE_UPLOAD_BYTES)
 
-    with open(file_path, "wb") as buffer:
-        content = await file.read()
-        buffer.write(content)
+    # Pre-render the resized copies the course grid requests
+    generate_derivatives(stored.url, "thumbnails", stored.sha256)
 
     # Update course thumbnail URL
-    course.thumbnail_url = f"/uploads/thumbnails/{filename}"
+    course.thumbnail_url = stored.url
     db.commit()
 
     return MessageResponse(
@@ -274,9 +304,266 @@ async def upload_course_thumbnail(
     )
 
 
+# ===== Resumable Video Upload Routes =====
+def get_upload_session(
+    upload_id: str, course_id: int, user_id: int, db: Session, lock: bool = False
+) -> CourseUploadSession:
+    """Load the caller's upload session; `lock` holds its row until commit, serializing complete and abort"""
+    query = db.query(CourseUploadSession).filter(
+        CourseUploadSession.id == upload_id,
+        CourseUploadSession.course_id == course_id,
+        CourseUploadSession.user_id == user_id
+    )
+    upload = (query.with_for_update() if lock else query).first()
+
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found"
+        )
+
+    return upload
+
+
+def build_upload_response(upload: CourseUploadSession) -> UploadSessionResponse:
+    response = UploadSessionResponse.model_validate(upload)
+    if upload.status == UploadStatus.ACTIVE:
+        chunks = list_received_chunks(upload.id)
+        response.received_chunks = sorted(chunks)
+        response.received_bytes = sum(chunks.values())
+    else:
+        response.received_chunks = list(range(upload.total_chunks))
+        response.received_bytes = upload.total_size
+    return response
+
+
+@router.post("/{course_id}/uploads", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED)
+def create_upload_session(
+    course_id: int,
+    upload_data: UploadSessionCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Start a resumable video upload (instructor only)
+
+    Chunks are then PUT (in any order, in parallel) to
+    `/uploads/{upload_id}/chunks/{index}`; every chunk except the last must be
+    exactly `chunk_size` bytes.
+    """
+    course = db.query(Course).filter(Course.id == course_id).first()
+
+    if not course:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+
+    # Verify ownership
+    if course.instructor_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You don't have permission to upload video for this course"
+        )
+
+    if upload_data.content_type not in VIDEO_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only MP4, MPEG, and MOV video files are allowed"
+        )
+
+    if upload_data.total_size > MAX_VIDEO_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the {MAX_VIDEO_UPLOAD_BYTES // (1024 * 1024)} MB limit"
+        )
+
+    upload = CourseUploadSession(
+        id=secrets.token_hex(16),
+        course_id=course_id,
+        user_id=current_user.id,
+        filename=upload_data.filename,
+        content_type=upload_data.content_type,
+        total_size=upload_data.total_size,
+        chunk_size=upload_data.chunk_size
+    )
+    create_session_dir(upload.id)
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+
+    return build_upload_response(upload)
+
+
+@router.put("/{course_id}/uploads/{upload_id}/chunks/{index}", response_model=MessageResponse)
+async def upload_chunk(
+    course_id: int,
+    upload_id: str,
+    index: int,
+    request: Request,
+    current_user: User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Upload one chunk as the raw request body; re-sending a chunk replaces it
+
+    Runs on the event loop so a slow client holds no worker thread while the
+    body trickles in.
+    """
+    result = await db.execute(
+        select(CourseUploadSession).where(
+            CourseUploadSession.id == upload_id,
+            CourseUploadSession.course_id == course_id,
+            CourseUploadSession.user_id == current_user.id
+        )
+    )
+    upload = result.scalar_one_or_none()
+
+    if not upload:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload session not found"
+        )
+
+    if upload.status != UploadStatus.ACTIVE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload session is already completed"
+        )
+
+    if index < 0 or index >= upload.total_chunks:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Chunk index must be between 0 and {upload.total_chunks - 1}"
+        )
+
+    # Release the connection before the (possibly slow) body transfer
+    await db.close()
+
+    expected_size = min(upload.chunk_size, upload.total_size - index * upload.chunk_size)
+    await write_chunk(upload_id, index, request.stream(), expected_size)
+
+    return MessageResponse(message="Chunk received", detail=str(index))
+
+
+@router.get("/{course_id}/uploads/{upload_id}", response_model=UploadSessionResponse)
+def get_upload_status(
+    course_id: int,
+    upload_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """List the chunks received so far, to resume an interrupted upload"""
+    upload = get_upload_session(upload_id, course_id, current_user.id, db)
+    return build_upload_response(upload)
+
+
+@router.post("/{course_id}/uploads/{upload_id}/complete", response_model=MessageResponse)
+def complete_upload(
+    course_id: int,
+    upload_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Assemble all chunks into the course video and publish it on the course"""
+    # A retried or concurrent complete waits here, then sees COMPLETED
+    upload = get_upload_session(upload_id, course_id, current_user.id, db, lock=True)
+
+    if upload.status != UploadStatus.ACTIVE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload session is already completed"
+        )
+
+    received = list_received_chunks(upload_id)
+    missing = [index for index in range(upload.total_chunks) if index not in received]
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Missing chunks: {missing[:20]}"
+        )
+
+    file_extension = upload_extension(upload.filename, "mp4")
+    stored = assemble_chunks(upload_id, upload.total_chunks, "courses", file_extension)
+
+    upload.status = UploadStatus.COMPLETED
+    course = db.query(Course).filter(Course.id == course_id).first()
+    enqueue_transcode(db, course, stored.url)
+    db.commit()
+
+    return MessageResponse(
+        message="Video uploaded successfully",
+        detail=course.video_url
+    )
+
+
+@router.delete("/{course_id}/uploads/{upload_id}", response_model=MessageResponse)
+def abort_upload(
+    course_id: int,
+    upload_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Abort an upload session and discard its chunks"""
+    upload = get_upload_session(upload_id, course_id, current_user.id, db, lock=True)
+
+    remove_session_dir(upload_id)
+    db.delete(upload)
+    db.commit()
+
+    return MessageResponse(message="Upload session aborted")
+
+
+# ===== Video Streaming Routes =====
+@router.post("/{course_id}/stream-token", response_model=StreamTokenResponse)
+def create_course_stream_token(
+    course_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Issue a signed stream URL for the course video (enrolled users, instructor, admins)
+
+    Access is checked here once per viewing session; the player's range
+    requests to the returned URL are authorized by the token alone.
+    """
+    course = db.query(Course).filter(Course.id == course_id).first()
+
+    if not course or not course.video_url:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course video not found"
+        )
+
+    if course.instructor_id != current_user.id and current_user.role != UserRole.ADMIN:
+        enrollment = db.query(CourseEnrollment).filter(
+            CourseEnrollment.user_id == current_user.id,
+            CourseEnrollment.course_id == course_id
+        ).first()
+        if not enrollment:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You are not enrolled in this course"
+            )
+
+    path, expires_at = create_stream_path(course_id, course.video_url)
+    return StreamTokenResponse(url=f"/api/v1/courses{path}", expires_at=expires_at)
+
+
+@router.api_route("/{course_id}/stream", methods=["GET", "HEAD"])
+async def stream_course_video(course_id: int, token: str, request: Request):
+    """Serve the course video with HTTP Range support (no database access)"""
+    video_url = verify_stream_token(token, course_id)
+    return file_range_response(request, video_url)
+
+
+@router.api_route("/{course_id}/stream/{token}/{file_path:path}", methods=["GET", "HEAD"])
+async def stream_course_hls(course_id: int, token: str, file_path: str, request: Request):
+    """Serve an HLS manifest, rendition playlist or segment (no database access)"""
+    granted = verify_stream_token(token, course_id)
+    return file_range_response(request, resolve_granted_url(granted, file_path))
+
+
 # ===== Enrollment Routes =====
 @router.post("/enroll", response_model=CourseEnrollmentResponse, status_code=status.HTTP_201_CREATED)
-async def enroll_in_course(
+def enroll_in_course(
     enrollment_data: CourseEnrollmentCreate,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
@@ -314,14 +601,22 @@ async def enroll_in_course(
     )
 
     db.add(enrollment)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent enrollment (unique on user_id, course_id)
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Already enrolled in this course"
+        )
     db.refresh(enrollment)
 
     return enrollment
 
 
 @router.get("/my-enrollments", response_model=List[CourseEnrollmentResponse])
-async def get_my_enrollments(
+def get_my_enrollments(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -334,7 +629,7 @@ async def get_my_enrollments(
 
 
 @router.patch("/enrollments/{enrollment_id}/progress", response_model=CourseEnrollmentResponse)
-async def update_course_progress(
+def update_course_progress(
     enrollment_id: int,
     progress_percentage: float,
     current_user: User = Depends(get_current_active_user),
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import RedirectResponse
+from typing import Optional
+
+from app.utils.images import (
+    AVAILABLE_FORMATS, ImageDecodeError, choose_format, get_derivative, resolve_image_source, snap_width
+)
+
+router = APIRouter()
+
+
+# ===== Image Derivative Routes =====
+@router.get("/image")
+def resized_image(
+    request: Request,
+    src: str,
+    w: int = Query(..., gt=0, le=4096),
+    format: Optional[str] = None
+):
+    """Redirect to a resized copy of an uploaded thumbnail or profile picture
+
+    The width is rounded up to a configured size and the format defaults to
+    the best one the browser accepts (AVIF, WebP, else JPEG). Derivatives
+    are rendered on first request and have content-hashed, immutable URLs.
+    """
+    source = resolve_image_source(src)
+    if source is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+
+    fmt = format or choose_format(request.headers.get("accept", ""))
+    if fmt not in AVAILABLE_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Format must be one of: {', '.join(AVAILABLE_FORMATS)}"
+        )
+
+    subdir, source_url = source
+    try:
+        url = get_derivative(source_url, snap_width(subdir, w), fmt)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+    except ImageDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Image cannot be decoded"
+        )
+
+    # Derivatives can be evicted and legacy sources replaced in place, so only
+    # the redirect is short-lived
+    return RedirectResponse(url, headers={"Cache-Control": "public, max-age=300", "Vary": "Accept"})
@@ -1,30 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from typing import Optional
-import stripe
+from typing import Mapping, Optional
 import os
 
 from app.database import get_db
-from app.models import User, Booking, Course, CourseEnrollment, BookingStatus
+from app.models import User, Booking, Course, CourseEnrollment, BookingStatus, PaymentEvent
 from app.schemas import (
     PaymentIntentCreate, PaymentIntentResponse,
     PaymentConfirm, MessageResponse
 )
 from app.routers.auth import get_current_active_user
+from app.utils.email import queue_booking_confirmation_email, queue_course_enrollment_email
+from app.utils.idempotency import (
+    request_fingerprint, begin_idempotent, complete_idempotent, abandon_idempotent
+)
+from app.utils.payment_gateways import (
+    PaymentGateway, PaymentGatewayError, WebhookSignatureError, get_gateway
+)
+from app.utils.tracing import SPAN_KIND_CLIENT, start_span
 
 router = APIRouter()
 
-# Initialize Stripe
-stripe.api_key = os.getenv("STRIPE_SECRET_KEY", "sk_test_your_stripe_secret_key")
+# "stripe" (default), "razorpay" or "fake" (offline, for load tests); see app/utils/payment_gateways.py
+PAYMENT_GATEWAY = os.getenv("PAYMENT_GATEWAY", "stripe")
+
+
+def load_gateway(name: str) -> PaymentGateway:
+    try:
+        return get_gateway(name)
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e)
+        )
 
 
 @router.post("/create-payment-intent", response_model=PaymentIntentResponse)
-async def create_payment_intent(
+def create_payment_intent(
     payment_data: PaymentIntentCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Create a Stripe payment intent for booking or course purchase"""
+    """Create a payment intent for booking or course purchase with the configured gateway
+
+    With an `Idempotency-Key` header, retries of the same request return the
+    first response without touching the database or the gateway again.
+    """
+    gateway = load_gateway(PAYMENT_GATEWAY)
+    if not idempotency_key:
+        return build_payment_intent(gateway, payment_data, current_user, db)
+
+    request_hash = request_fingerprint("create-payment-intent", payment_data.model_dump())
+    stored = begin_idempotent(db, current_user.id, idempotency_key, "create-payment-intent", request_hash)
+    if stored is not None:
+        return PaymentIntentResponse(**stored)
+
+    try:
+        result = build_payment_intent(gateway, payment_data, current_user, db, idempotency_key)
+    except BaseException:
+        abandon_idempotent(db, current_user.id, idempotency_key)
+        raise
+
+    complete_idempotent(db, current_user.id, idempotency_key, result.model_dump())
+    db.commit()
+    return result
+
+
+def build_payment_intent(
+    gateway: PaymentGateway,
+    payment_data: PaymentIntentCreate,
+    current_user: User,
+    db: Session,
+    idempotency_key: Optional[str] = None
+) -> PaymentIntentResponse:
     try:
         amount_cents = 0
         description = ""
@@ -80,17 +130,21 @@ async def create_payment_intent(
                 detail="Must provide either booking_id or course_id"
             )
 
-        # Create Stripe payment intent
-        payment_intent = stripe.PaymentIntent.create(
-            amount=amount_cents,
-            currency="usd",
-            description=description,
-            metadata={
-                "user_id": current_user.id,
-                "booking_id": payment_data.booking_id or "",
-                "course_id": payment_data.course_id or ""
-            }
-        )
+        with start_span(f"{gateway.name} create_intent", SPAN_KIND_CLIENT, {
+            "payment.gateway": gateway.name,
+            "payment.amount_cents": amount_cents
+        }):
+            payment_intent = gateway.create_intent(
+                amount_cents,
+                description,
+                {
+                    "user_id": str(current_user.id),
+                    "booking_id": str(payment_data.booking_id or ""),
+                    "course_id": str(payment_data.course_id or "")
+                },
+                # The provider dedupes too, in case our stored response was lost
+                idempotency_key=f"user-{current_user.id}-{idempotency_key}" if idempotency_key else None
+            )
 
         return PaymentIntentResponse(
             client_secret=payment_intent.client_secret,
@@ -98,92 +152,185 @@ async def create_payment_intent(
             amount=amount_cents / 100
         )
 
-    except stripe.error.StripeError as e:
+    except PaymentGatewayError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Stripe error: {str(e)}"
+            detail=str(e)
         )
 
 
-@router.post("/confirm-payment", response_model=MessageResponse)
-async def confirm_payment(
-    payment_confirm: PaymentConfirm,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    """Confirm payment and update booking/enrollment status"""
-    try:
-        # Retrieve payment intent from Stripe
-        payment_intent = stripe.PaymentIntent.retrieve(payment_confirm.payment_intent_id)
-
-        if payment_intent.status != "succeeded":
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Payment not successful"
-            )
-
-        # Update booking or enrollment
-        if payment_confirm.booking_id:
-            booking = db.query(Booking).filter(
-                Booking.id == payment_confirm.booking_id,
-                Booking.user_id == current_user.id
-            ).first()
+# ===== Fulfillment =====
+def fulfill_payment(db: Session, payment_intent_id: str, metadata: dict) -> bool:
+    """Confirm the booking or create the enrollment a succeeded payment was for.
+
+    Idempotent: returns False when it was already fulfilled. The caller commits.
+    """
+    user_id = int(metadata.get("user_id") or 0)
+    booking_id = int(metadata.get("booking_id") or 0)
+    course_id = int(metadata.get("course_id") or 0)
+
+    if booking_id:
+        booking = db.query(Booking).filter(
+            Booking.id == booking_id,
+            Booking.user_id == user_id
+        ).with_for_update().first()
+        if not booking or booking.payment_id == payment_intent_id:
+            return False
+
+        booking.payment_id = payment_intent_id
+        booking.status = BookingStatus.CONFIRMED
+
+        # Delivered by the mailer worker once this transaction commits
+        queue_booking_confirmation_email(db, booking, booking.user, booking.mentor)
+        return True
+
+    if course_id:
+        exists = db.query(CourseEnrollment.id).filter(
+            CourseEnrollment.user_id == user_id,
+            CourseEnrollment.course_id == course_id
+        ).first()
+        course = db.query(Course).filter(Course.id == course_id).first()
+        if exists or not course:
+            return False
+
+        db.add(CourseEnrollment(user_id=user_id, course_id=course_id, payment_id=payment_intent_id))
+        user = db.query(User).filter(User.id == user_id).first()
+        queue_course_enrollment_email(db, course, user)
+        return True
+
+    return False
+
+
+async def read_raw_body(request: Request) -> bytes:
+    """The exact request bytes, which the webhook signature is computed over"""
+    return await request.body()
+
+
+def process_webhook(
+    gateway: PaymentGateway,
+    payload: bytes,
+    headers: Mapping[str, str],
+    db: Session
+) -> MessageResponse:
+    """Verify a gateway's webhook delivery and apply it exactly once
+
+    Each event is recorded in `payment_events` in the same transaction as
+    its effects, so the provider's redeliveries are acknowledged without
+    being applied twice. Any error rolls both back and returns 5xx, and the
+    provider retries.
+    """
+    if not gateway.webhook_secret:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Webhook secret is not configured"
+        )
 
-            if not booking:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Booking not found"
-                )
+    try:
+        event = gateway.parse_webhook(payload, headers)
+    except WebhookSignatureError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
-            booking.payment_id = payment_confirm.payment_intent_id
-            booking.status = BookingStatus.CONFIRMED
+    inserted = db.execute(
+        pg_insert(PaymentEvent)
+        .values(id=event.id, type=event.type, payment_intent_id=event.payment_id)
+        .on_conflict_do_nothing()
+        .returning(PaymentEvent.id)
+    ).first()
+    if inserted is None:
+        return MessageResponse(message="Event already processed", detail=event.id)
 
-            # TODO: Send email notification
-            # send_booking_confirmation_email(booking, current_user)
+    if event.succeeded and event.payment_id:
+        fulfill_payment(db, event.payment_id, event.metadata)
+    db.commit()
 
-        elif payment_confirm.course_id:
-            # Create enrollment
-            enrollment = CourseEnrollment(
-                user_id=current_user.id,
-                course_id=payment_confirm.course_id,
-                payment_id=payment_confirm.payment_intent_id
-            )
+    return MessageResponse(message="Event processed", detail=event.id)
 
-            db.add(enrollment)
 
-            # TODO: Send email notification
-            # send_course_enrollment_email(enrollment, current_user)
+@router.post("/webhook", response_model=MessageResponse)
+def payment_webhook(
+    request: Request,
+    payload: bytes = Depends(read_raw_body),
+    db: Session = Depends(get_db)
+):
+    """Receive the configured gateway's events; the only place payments are fulfilled"""
+    return process_webhook(load_gateway(PAYMENT_GATEWAY), payload, request.headers, db)
 
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Must provide either booking_id or course_id"
-            )
 
-        db.commit()
+@router.post("/confirm-payment", response_model=MessageResponse)
+def confirm_payment(
+    payment_confirm: PaymentConfirm,
+    response: Response,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Report whether a payment has been fulfilled (202 while the webhook is pending)
+
+    Fulfillment happens in the payment webhook, so this is a local read with
+    no call to the gateway. Clients poll it after confirming the card payment.
+    """
+    if payment_confirm.booking_id:
+        fulfilled = db.query(Booking.id).filter(
+            Booking.id == payment_confirm.booking_id,
+            Booking.user_id == current_user.id,
+            Booking.payment_id == payment_confirm.payment_intent_id,
+            Booking.status == BookingStatus.CONFIRMED
+        ).first()
+
+    elif payment_confirm.course_id:
+        fulfilled = db.query(CourseEnrollment.id).filter(
+            CourseEnrollment.user_id == current_user.id,
+            CourseEnrollment.course_id == payment_confirm.course_id,
+            CourseEnrollment.payment_id == payment_confirm.payment_intent_id
+        ).first()
+
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Must provide either booking_id or course_id"
+        )
 
+    if not fulfilled:
+        response.status_code = status.HTTP_202_ACCEPTED
         return MessageResponse(
-            message="Payment confirmed successfully",
+            message="Payment pending",
             detail=f"Payment ID: {payment_confirm.payment_intent_id}"
         )
 
-    except stripe.error.StripeError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Stripe error: {str(e)}"
-        )
+    return MessageResponse(
+        message="Payment confirmed successfully",
+        detail=f"Payment ID: {payment_confirm.payment_intent_id}"
+    )
 
 
 @router.post("/razorpay/create-order", response_model=dict)
-async def create_razorpay_order(
+def create_razorpay_order(
     payment_data: PaymentIntentCreate,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
-    """Create a Razorpay order (alternative to Stripe for Indian market)"""
-    # Note: Razorpay implementation would be similar to Stripe
-    # This is a placeholder for Razorpay integration
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Razorpay integration coming soon"
-    )
+    """Create a Razorpay order (alternative to Stripe for Indian market)
+
+    Checkout.js is opened with `key_id` and `order_id`; the payment is
+    fulfilled from /razorpay/webhook like Stripe's.
+    """
+    gateway = load_gateway("razorpay")
+    intent = build_payment_intent(gateway, payment_data, current_user, db)
+    return {
+        "order_id": intent.payment_intent_id,
+        "amount": intent.amount,
+        "currency": gateway.currency,
+        "key_id": gateway.key_id
+    }
+
+
+@router.post("/razorpay/webhook", response_model=MessageResponse)
+def razorpay_webhook(
+    request: Request,
+    payload: bytes = Depends(read_raw_body),
+    db: Session = Depends(get_db)
+):
+    """Receive Razorpay events (payment.captured, order.paid)"""
+    return process_webhook(load_gateway("razorpay"), payload, request.headers, db)
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Generic, Optional, List, TypeVar
 from datetime import datetime
-from app.models import UserRole, MentorStatus, BookingStatus
+from app.models import UserRole, MentorStatus, BookingStatus, UploadStatus, VideoStatus
 
 
 # ===== User Schemas =====
@@ -146,12 +146,21 @@ class CourseUpdate(BaseModel):
     is_published: Optional[bool] = None
 
 
+class VideoRendition(BaseModel):
+    name: str
+    height: int
+    bandwidth: int
+    playlist: str
+
+
 class CourseResponse(BaseModel):
     id: int
     instructor_id: int
     title: str
     description: Optional[str]
     video_url: Optional[str]
+    video_status: Optional[VideoStatus] = None
+    video_renditions: Optional[List[VideoRendition]] = None
     thumbnail_url: Optional[str]
     price: float
     duration_minutes: Optional[int]
@@ -163,6 +172,35 @@ class CourseResponse(BaseModel):
         from_attributes = True
 
 
+class StreamTokenResponse(BaseModel):
+    url: str
+    expires_at: datetime
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    content_type: str
+    total_size: int = Field(..., gt=0)
+    chunk_size: int = Field(8 * 1024 * 1024, ge=1024 * 1024, le=64 * 1024 * 1024)
+
+
+class UploadSessionResponse(BaseModel):
+    id: str
+    course_id: int
+    filename: str
+    content_type: str
+    total_size: int
+    chunk_size: int
+    total_chunks: int
+    status: UploadStatus
+    received_chunks: List[int] = []
+    received_bytes: int = 0
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class CourseEnrollmentCreate(BaseModel):
     course_id: int
     payment_id: Optional[str] = None
@@ -262,3 +300,12 @@ class PaymentConfirm(BaseModel):
 class MessageResponse(BaseModel):
     message: str
     detail: Optional[str] = None
+
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    """Cursor-paginated list; pass next_cursor back as `cursor` for the next page"""
+    items: List[T]
+    next_cursor: Optional[str] = None
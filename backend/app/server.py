@@ -0,0 +1,19 @@
+"""Gunicorn worker class for the production server (see gunicorn.conf.py)"""
+from uvicorn.workers import UvicornWorker
+
+
+class Worker(UvicornWorker):
+    """Uvicorn worker pinned to uvloop and httptools.
+
+    On SIGTERM uvicorn stops accepting, lets in-flight requests finish and
+    runs the shutdown handlers. It waits at most a few seconds less than
+    gunicorn's graceful_timeout, so shutdown still runs before gunicorn
+    kills the worker.
+    """
+
+    # uvicorn's "auto" silently falls back to asyncio/h11 when they're missing
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(int(self.cfg.graceful_timeout) - 5, 1)
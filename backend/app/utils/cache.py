@@ -0,0 +1,84 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class CacheBackend:
+    """Key/value cache for JSON-serializable values with a per-entry TTL"""
+
+    def get(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: dict, ttl: int):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """In-process cache with TTL expiry and LRU eviction (one per worker)"""
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class RedisCache(CacheBackend):
+    """Cache shared by all workers, stored as JSON strings in Redis"""
+
+    def __init__(self, url: str, prefix: str = ""):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("The redis cache backend requires the 'redis' package (pip install redis)")
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[dict]:
+        raw = self._client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: dict, ttl: int):
+        self._client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    def delete(self, key: str):
+        self._client.delete(self.prefix + key)
+
+
+def create_cache(backend: str, prefix: str = "", maxsize: int = 10000, redis_url: str = None) -> CacheBackend:
+    """Build a cache backend by name ("memory" or "redis")"""
+    if backend == "memory":
+        return MemoryCache(maxsize=maxsize)
+    if backend == "redis":
+        if not redis_url:
+            raise RuntimeError("REDIS_URL must be set to use the redis cache backend")
+        return RedisCache(redis_url, prefix=prefix)
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -1,21 +1,209 @@
-import smtplib
+import logging
 import os
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List
+from typing import Iterator, List, Optional, Sequence
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
 from datetime import datetime
 
+from app.models import OutboundEmail
+from app.utils.templates import CompiledTemplate
+from app.utils.tracing import SPAN_KIND_CLIENT, start_span
+
+logger = logging.getLogger("talesoul.email")
+
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+# Servers drop idle sessions; NOOP-check connections idle longer than this
+SMTP_IDLE_CHECK_SECONDS = float(os.getenv("SMTP_IDLE_CHECK_SECONDS", "30"))
+# Reconnect after this many messages (many providers cap messages per session)
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "100"))
+
+
+class _PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.last_used = time.monotonic()
+        self.sent = 0
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except Exception:
+            self.smtp.close()
+
+
+class SMTPConnectionPool:
+    """Bounded pool of logged-in SMTP sessions, reused across messages.
+
+    The connect, STARTTLS and login handshake happens once per connection
+    instead of once per message. A connection that fails mid-send is
+    discarded rather than returned.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str = "",
+        password: str = "",
+        use_tls: bool = True,
+        size: int = SMTP_POOL_SIZE
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self._idle = queue.LifoQueue()  # Most recently used first, so spare connections age out
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self) -> _PooledConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        try:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except BaseException:
+            smtp.close()
+            raise
+        return _PooledConnection(smtp)
+
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+
+            if time.monotonic() - conn.last_used < SMTP_IDLE_CHECK_SECONDS:
+                return conn
+            try:
+                if conn.smtp.noop()[0] == 250:
+                    return conn
+            except smtplib.SMTPException:
+                pass
+            conn.smtp.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[_PooledConnection]:
+        """Borrow a connection; blocks while all `size` connections are in use"""
+        self._slots.acquire()
+        try:
+            conn = self._checkout()
+            try:
+                yield conn
+            except BaseException:
+                conn.smtp.close()
+                raise
+
+            conn.last_used = time.monotonic()
+            if conn.sent >= SMTP_MAX_MESSAGES_PER_CONNECTION:
+                conn.close()
+            else:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
 
 class EmailService:
-    """Email service for sending notifications"""
+    """Email service for sending notifications
+
+    Sends go through a connection pool shared by every EmailService in the
+    process. Request handlers should not send directly: queue the message
+    with `queue_email` and let the mailer worker (app.workers.mailer)
+    deliver it.
+    """
+
+    _pool: Optional[SMTPConnectionPool] = None
+    _pool_lock = threading.Lock()
 
     def __init__(self):
         self.smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
         self.smtp_port = int(os.getenv("SMTP_PORT", "587"))
         self.smtp_username = os.getenv("SMTP_USERNAME", "")
         self.smtp_password = os.getenv("SMTP_PASSWORD", "")
+        self.smtp_use_tls = os.getenv("SMTP_USE_TLS", "true").lower() in ("1", "true", "yes")
         self.from_email = os.getenv("FROM_EMAIL", "noreply@talesoul.com")
 
+    @property
+    def pool(self) -> SMTPConnectionPool:
+        with EmailService._pool_lock:
+            if EmailService._pool is None:
+                EmailService._pool = SMTPConnectionPool(
+                    self.smtp_server, self.smtp_port, self.smtp_username, self.smtp_password, self.smtp_use_tls
+                )
+            return EmailService._pool
+
+    def build_message(
+        self,
+        to_emails: List[str],
+        subject: str,
+        html_content: str,
+        text_content: str = None
+    ) -> MIMEMultipart:
+        message = MIMEMultipart("alternative")
+        message["From"] = self.from_email
+        message["To"] = ", ".join(to_emails)
+        message["Subject"] = subject
+
+        # Add text and HTML parts
+        if text_content:
+            message.attach(MIMEText(text_content, "plain"))
+        message.attach(MIMEText(html_content, "html"))
+        return message
+
+    def send_messages(self, messages: Sequence[MIMEMultipart]) -> List[Optional[Exception]]:
+        """Send a batch over one pooled connection; returns an error (or None) per message.
+
+        A refused message does not affect the rest. When the connection
+        itself fails, that message and the remaining ones are retried once
+        on a fresh connection.
+        """
+        results: List[Optional[Exception]] = [None] * len(messages)
+        if not messages:
+            return results
+
+        # A root span in the mailer worker; a child span in a traced request
+        with start_span("smtp send", SPAN_KIND_CLIENT, {
+            "server.address": self.smtp_server,
+            "email.messages": len(messages)
+        }, root=True) as span:
+            index = 0
+            for attempt in range(2):
+                try:
+                    with self.pool.connection() as conn:
+                        while index < len(messages):
+                            try:
+                                conn.smtp.send_message(messages[index])
+                            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as exc:
+                                results[index] = exc
+                            conn.sent += 1
+                            index += 1
+                    break
+                except (smtplib.SMTPException, OSError) as exc:
+                    if attempt == 1:
+                        for remaining in range(index, len(messages)):
+                            results[remaining] = exc
+
+            if span is not None:
+                span.set_attribute("email.failed", sum(error is not None for error in results))
+        return results
+
     def send_email(
         self,
         to_emails: List[str],
@@ -23,57 +211,52 @@ class EmailService:
         html_content: str,
         text_content: str = None
     ):
-        """Send an email using SMTP"""
+        """Send an email using SMTP (blocking)"""
         try:
-            # Create message
-            message = MIMEMultipart("alternative")
-            message["From"] = self.from_email
-            message["To"] = ", ".join(to_emails)
-            message["Subject"] = subject
-
-            # Add text and HTML parts
-            if text_content:
-                text_part = MIMEText(text_content, "plain")
-                message.attach(text_part)
-
-            html_part = MIMEText(html_content, "html")
-            message.attach(html_part)
-
-            # Connect to SMTP server and send
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                if self.smtp_username and self.smtp_password:
-                    server.login(self.smtp_username, self.smtp_password)
-                server.send_message(message)
-
+            message = self.build_message(to_emails, subject, html_content, text_content)
+            error = self.send_messages([message])[0]
+            if error is not None:
+                raise error
             return True
 
         except Exception as e:
-            print(f"Failed to send email: {str(e)}")
+            logger.warning("Failed to send email: %s", e)
             return False
 
 
-# Email Templates
+def queue_email(db: Session, to_emails: List[str], subject: str, html_content: str, text_content: str = None):
+    """Add an email to the outbox for the mailer worker (caller commits).
+
+    The message is committed with the caller's transaction, so it is sent
+    if and only if the change it announces is saved.
+    """
+    db.add(OutboundEmail(
+        to_emails=list(to_emails),
+        subject=subject,
+        html_content=html_content,
+        text_content=text_content
+    ))
 
-def get_booking_confirmation_template(booking, user, mentor):
-    """Generate booking confirmation email template"""
-    scheduled_date = booking.scheduled_at.strftime("%B %d, %Y at %I:%M %p")
 
-    html = f"""
+# Email Templates
+# Parsed once at import; see app.utils.templates. HTML templates escape
+# every field unless marked `|raw`.
+
+BOOKING_CONFIRMATION_HTML = CompiledTemplate("""
     <!DOCTYPE html>
     <html>
     <head>
         <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                       color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
-            .content {{ background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }}
-            .booking-details {{ background: white; padding: 20px; border-radius: 8px; margin: 20px 0; }}
-            .detail-row {{ display: flex; justify-content: space-between; padding: 10px 0;
-                          border-bottom: 1px solid #eee; }}
-            .button {{ display: inline-block; padding: 12px 30px; background: #667eea;
-                      color: white; text-decoration: none; border-radius: 5px; margin: 20px 0; }}
+            body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+            .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+            .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                       color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }
+            .content { background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }
+            .booking-details { background: white; padding: 20px; border-radius: 8px; margin: 20px 0; }
+            .detail-row { display: flex; justify-content: space-between; padding: 10px 0;
+                          border-bottom: 1px solid #eee; }
+            .button { display: inline-block; padding: 12px 30px; background: #667eea;
+                      color: white; text-decoration: none; border-radius: 5px; margin: 20px 0; }
         </style>
     </head>
     <body>
@@ -82,28 +265,28 @@ def get_booking_confirmation_template(booking, user, mentor):
                 <h1>Booking Confirmed!</h1>
             </div>
             <div class="content">
-                <p>Hi {user.full_name},</p>
+                <p>Hi {{ user_name }},</p>
                 <p>Your mentorship session has been confirmed. We're excited for your upcoming session!</p>
 
                 <div class="booking-details">
                     <h2>Session Details</h2>
                     <div class="detail-row">
                         <strong>Mentor:</strong>
-                        <span>{mentor.full_name}</span>
+                        <span>{{ mentor_name }}</span>
                     </div>
                     <div class="detail-row">
                         <strong>Date & Time:</strong>
-                        <span>{scheduled_date}</span>
+                        <span>{{ scheduled_date }}</span>
                     </div>
                     <div class="detail-row">
                         <strong>Duration:</strong>
-                        <span>{booking.duration_minutes} minutes</span>
+                        <span>{{ duration_minutes }} minutes</span>
                     </div>
                     <div class="detail-row">
                         <strong>Price:</strong>
-                        <span>${booking.price:.2f}</span>
+                        <span>${{ price }}</span>
                     </div>
-                    {f'<div class="detail-row"><strong>Meeting Link:</strong><span>{booking.meeting_link}</span></div>' if booking.meeting_link else ''}
+                    {{ meeting_link_row|raw }}
                 </div>
 
                 <p>Your mentor will share the meeting link before the session. You can view your booking details
@@ -118,45 +301,44 @@ def get_booking_confirmation_template(booking, user, mentor):
         </div>
     </body>
     </html>
-    """
+    """)
+
+MEETING_LINK_ROW_HTML = CompiledTemplate(
+    '<div class="detail-row"><strong>Meeting Link:</strong><span>{{ meeting_link }}</span></div>'
+)
 
-    text = f"""
+BOOKING_CONFIRMATION_TEXT = CompiledTemplate("""
     Booking Confirmed!
 
-    Hi {user.full_name},
+    Hi {{ user_name }},
 
     Your mentorship session has been confirmed.
 
     Session Details:
-    - Mentor: {mentor.full_name}
-    - Date & Time: {scheduled_date}
-    - Duration: {booking.duration_minutes} minutes
-    - Price: ${booking.price:.2f}
+    - Mentor: {{ mentor_name }}
+    - Date & Time: {{ scheduled_date }}
+    - Duration: {{ duration_minutes }} minutes
+    - Price: ${{ price }}
 
     Your mentor will share the meeting link before the session.
 
     Best regards,
     The TaleSoul Team
-    """
-
-    return html, text
+    """, escape=False)
 
-
-def get_course_enrollment_template(course, user):
-    """Generate course enrollment confirmation email template"""
-    html = f"""
+COURSE_ENROLLMENT_HTML = CompiledTemplate("""
     <!DOCTYPE html>
     <html>
     <head>
         <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .header {{ background: linear-gradient(135deg, #27ae60 0%, #229954 100%);
-                       color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
-            .content {{ background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }}
-            .course-info {{ background: white; padding: 20px; border-radius: 8px; margin: 20px 0; }}
-            .button {{ display: inline-block; padding: 12px 30px; background: #27ae60;
-                      color: white; text-decoration: none; border-radius: 5px; margin: 20px 0; }}
+            body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+            .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+            .header { background: linear-gradient(135deg, #27ae60 0%, #229954 100%);
+                       color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }
+            .content { background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }
+            .course-info { background: white; padding: 20px; border-radius: 8px; margin: 20px 0; }
+            .button { display: inline-block; padding: 12px 30px; background: #27ae60;
+                      color: white; text-decoration: none; border-radius: 5px; margin: 20px 0; }
         </style>
     </head>
     <body>
@@ -165,13 +347,13 @@ def get_course_enrollment_template(course, user):
                 <h1>Welcome to Your Course!</h1>
             </div>
             <div class="content">
-                <p>Hi {user.full_name},</p>
+                <p>Hi {{ user_name }},</p>
                 <p>Congratulations! You've successfully enrolled in the course.</p>
 
                 <div class="course-info">
-                    <h2>{course.title}</h2>
-                    <p>{course.description}</p>
-                    <p><strong>Duration:</strong> {course.duration_minutes} minutes</p>
+                    <h2>{{ course_title }}</h2>
+                    <p>{{ course_description }}</p>
+                    <p><strong>Duration:</strong> {{ duration_minutes }} minutes</p>
                 </div>
 
                 <p>You can now access all course materials and start learning at your own pace.</p>
@@ -185,34 +367,161 @@ def get_course_enrollment_template(course, user):
         </div>
     </body>
     </html>
-    """
+    """)
 
-    text = f"""
+COURSE_ENROLLMENT_TEXT = CompiledTemplate("""
     Welcome to Your Course!
 
-    Hi {user.full_name},
+    Hi {{ user_name }},
 
-    Congratulations! You've successfully enrolled in: {course.title}
+    Congratulations! You've successfully enrolled in: {{ course_title }}
 
-    {course.description}
+    {{ course_description }}
 
     You can now access all course materials and start learning.
 
     Best regards,
     The TaleSoul Team
-    """
+    """, escape=False)
 
+
+DIGEST_HTML = CompiledTemplate("""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <style>
+            body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+            .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+            .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+                       color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }
+            .content { background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }
+            .section { background: white; padding: 20px; border-radius: 8px; margin: 20px 0; }
+            .item { padding: 10px 0; border-bottom: 1px solid #eee; }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>Your TaleSoul Update</h1>
+            </div>
+            <div class="content">
+                <p>Hi {{ user_name }},</p>
+                {{ sections|raw }}
+                <p>Best regards,<br>The TaleSoul Team</p>
+            </div>
+        </div>
+    </body>
+    </html>
+    """)
+
+DIGEST_SECTION_HTML = CompiledTemplate("""
+                <div class="section">
+                    <h2>{{ title }}</h2>
+                    {{ items|raw }}
+                </div>""")
+
+DIGEST_REPLY_HTML = CompiledTemplate(
+    '<div class="item"><strong>{{ author_name }}</strong> replied to <em>{{ post_title }}</em>: {{ excerpt }}</div>'
+)
+
+DIGEST_SESSION_HTML = CompiledTemplate(
+    '<div class="item">{{ scheduled_date }}: {{ duration_minutes }} minute session with <strong>{{ with_name }}</strong></div>'
+)
+
+DIGEST_TEXT = CompiledTemplate("""
+    Your TaleSoul Update
+
+    Hi {{ user_name }},
+{{ sections }}
+    Best regards,
+    The TaleSoul Team
+    """, escape=False)
+
+DIGEST_SECTION_TEXT = CompiledTemplate("""
+    {{ title }}:
+{{ items }}
+""", escape=False)
+
+DIGEST_REPLY_TEXT = CompiledTemplate("    - {{ author_name }} replied to \"{{ post_title }}\": {{ excerpt }}", escape=False)
+
+DIGEST_SESSION_TEXT = CompiledTemplate(
+    "    - {{ scheduled_date }}: {{ duration_minutes }} minute session with {{ with_name }}", escape=False
+)
+
+
+def render_digest(user_name: str, replies: List[dict], sessions: List[dict]):
+    """Render one recipient's digest; cost is linear in their item count"""
+    html_sections = []
+    text_sections = []
+    for title, items, item_html, item_text in (
+        ("New replies to your posts", replies, DIGEST_REPLY_HTML, DIGEST_REPLY_TEXT),
+        ("Upcoming sessions", sessions, DIGEST_SESSION_HTML, DIGEST_SESSION_TEXT),
+    ):
+        if items:
+            html_sections.append(DIGEST_SECTION_HTML.render(
+                {"title": title, "items": "".join(item_html.render_many(items))}
+            ))
+            text_sections.append(DIGEST_SECTION_TEXT.render(
+                {"title": title, "items": "\n".join(item_text.render_many(items))}
+            ))
+
+    html = DIGEST_HTML.render({"user_name": user_name, "sections": "".join(html_sections)})
+    text = DIGEST_TEXT.render({"user_name": user_name, "sections": "".join(text_sections)})
     return html, text
 
 
-# Helper functions to send specific emails
+def booking_context(booking, user, mentor) -> dict:
+    return {
+        "user_name": user.full_name,
+        "mentor_name": mentor.full_name,
+        "scheduled_date": booking.scheduled_at.strftime("%B %d, %Y at %I:%M %p"),
+        "duration_minutes": booking.duration_minutes,
+        "price": f"{booking.price:.2f}",
+        "meeting_link_row": (
+            MEETING_LINK_ROW_HTML.render({"meeting_link": booking.meeting_link}) if booking.meeting_link else ""
+        ),
+    }
+
+
+def get_booking_confirmation_template(booking, user, mentor):
+    """Generate booking confirmation email template"""
+    context = booking_context(booking, user, mentor)
+    return BOOKING_CONFIRMATION_HTML.render(context), BOOKING_CONFIRMATION_TEXT.render(context)
+
+
+def course_enrollment_context(course, user) -> dict:
+    return {
+        "user_name": user.full_name,
+        "course_title": course.title,
+        "course_description": course.description,
+        "duration_minutes": course.duration_minutes,
+    }
+
+
+def get_course_enrollment_template(course, user):
+    """Generate course enrollment confirmation email template"""
+    context = course_enrollment_context(course, user)
+    return COURSE_ENROLLMENT_HTML.render(context), COURSE_ENROLLMENT_TEXT.render(context)
+
+
+def queue_emails(db: Session, emails: List[dict]):
+    """Add many emails to the outbox in one executemany (caller commits).
+
+    Each dict has the `queue_email` arguments: to_emails, subject,
+    html_content and text_content.
+    """
+    if emails:
+        db.execute(insert(OutboundEmail), emails)
+
+
+# Helper functions to queue specific emails
 
-def send_booking_confirmation_email(booking, user, mentor):
-    """Send booking confirmation email"""
-    email_service = EmailService()
+def queue_booking_confirmation_email(db, booking, user, mentor):
+    """Queue a booking confirmation email (caller commits)"""
     html, text = get_booking_confirmation_template(booking, user, mentor)
 
-    return email_service.send_email(
+    queue_email(
+        db,
         to_emails=[user.email],
         subject="Booking Confirmed - TaleSoul",
         html_content=html,
@@ -220,12 +529,12 @@ def send_booking_confirmation_email(booking, user, mentor):
     )
 
 
-def send_course_enrollment_email(course, user):
-    """Send course enrollment confirmation email"""
-    email_service = EmailService()
+def queue_course_enrollment_email(db, course, user):
+    """Queue a course enrollment confirmation email (caller commits)"""
     html, text = get_course_enrollment_template(course, user)
 
-    return email_service.send_email(
+    queue_email(
+        db,
         to_emails=[user.email],
         subject=f"Enrolled in {course.title} - TaleSoul",
         html_content=html,
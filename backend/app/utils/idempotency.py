@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models import IdempotencyKey
+
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", str(24 * 3600)))
+IDEMPOTENCY_SWEEP_INTERVAL = float(os.getenv("IDEMPOTENCY_SWEEP_INTERVAL", "600"))
+
+
+def request_fingerprint(endpoint: str, payload: dict) -> str:
+    """Hash of the request a key was first used with, to reject reuse for another request"""
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{endpoint}\n{body}".encode()).hexdigest()
+
+
+def begin_idempotent(db: Session, user_id: int, key: str, endpoint: str, request_hash: str) -> Optional[dict]:
+    """Claim an idempotency key, or return the response stored for it.
+
+    Returns None when this request owns the key and should run; the caller
+    then calls `complete_idempotent` or `abandon_idempotent`. An expired
+    key is reclaimed as if new. Commits the claim so concurrent retries see it.
+    """
+    for _ in range(2):
+        now = datetime.now(timezone.utc)
+        expires_at = now + timedelta(seconds=IDEMPOTENCY_KEY_TTL)
+        statement = pg_insert(IdempotencyKey).values(
+            user_id=user_id, key=key, endpoint=endpoint, request_hash=request_hash, expires_at=expires_at
+        )
+        claimed = db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+                set_={
+                    "endpoint": endpoint,
+                    "request_hash": request_hash,
+                    "response": None,
+                    "created_at": now,
+                    "expires_at": expires_at,
+                },
+                where=IdempotencyKey.expires_at < now
+            ).returning(IdempotencyKey.key)
+        ).first()
+        db.commit()
+
+        if claimed is not None:
+            return None
+
+        record = db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key
+        ).first()
+        if record is not None:
+            break
+        # The conflicting row was swept or abandoned in between; claim again
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress"
+        )
+
+    if record.endpoint != endpoint or record.request_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different request"
+        )
+    if record.response is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress"
+        )
+    return record.response
+
+
+def complete_idempotent(db: Session, user_id: int, key: str, response: dict):
+    """Store the response to replay for later requests with the key (caller commits)"""
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key
+    ).update({"response": response}, synchronize_session=False)
+
+
+def abandon_idempotent(db: Session, user_id: int, key: str):
+    """Release a key whose request failed, so a retry runs it again"""
+    db.rollback()
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key
+    ).delete(synchronize_session=False)
+    db.commit()
+
+
+def sweep_expired_keys(db: Session) -> int:
+    """Delete expired keys; returns the number removed"""
+    result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.now(timezone.utc)))
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,239 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from typing import BinaryIO, Dict, Optional
+
+from PIL import Image, ImageOps
+
+from app.utils.storage import parse_content_key
+from app.utils.uploads import UPLOAD_DIR, UPLOAD_CHUNK_SIZE, open_upload, storage
+
+try:  # AVIF needs the optional pillow-avif-plugin
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+# Derivatives live under UPLOAD_DIR/derived with content-hashed names, so
+# they can be cached forever
+DERIVED_SUBDIR = "derived"
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_MB", "1024")) * 1024 * 1024
+IMAGE_EVICT_INTERVAL = float(os.getenv("IMAGE_EVICT_INTERVAL", "60"))
+WEBP_QUALITY = int(os.getenv("WEBP_QUALITY", "80"))
+AVIF_QUALITY = int(os.getenv("AVIF_QUALITY", "60"))
+
+# Widths generated on upload and the only ones served on request
+DERIVATIVE_WIDTHS = {
+    "thumbnails": (320, 640, 1280),
+    "profile_pictures": (64, 128, 256),
+}
+
+# Output format -> (Pillow format, save options)
+FORMATS = {
+    "avif": ("AVIF", {"quality": AVIF_QUALITY}),
+    "webp": ("WEBP", {"quality": WEBP_QUALITY, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+Image.init()  # Register encoder plugins so Image.SAVE is complete
+AVAILABLE_FORMATS = [name for name, (pil_format, _) in FORMATS.items() if pil_format in Image.SAVE]
+
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp", "jpeg": "image/jpeg"}
+
+
+def choose_format(accept: str) -> str:
+    """Best format the client advertises in its Accept header"""
+    for name in ("avif", "webp"):
+        if name in AVAILABLE_FORMATS and MIME_TYPES[name] in accept:
+            return name
+    return "jpeg"
+
+
+def is_valid_image(fileobj: BinaryIO) -> bool:
+    """Check that an upload parses as an image, without decoding the pixels"""
+    try:
+        with Image.open(fileobj) as image:
+            image.verify()
+        return True
+    except Exception:
+        return False
+    finally:
+        fileobj.seek(0)
+
+
+def snap_width(subdir: str, width: int) -> int:
+    """Smallest configured width that covers the request (caps resize work)"""
+    widths = DERIVATIVE_WIDTHS[subdir]
+    return next((w for w in widths if w >= width), widths[-1])
+
+
+@lru_cache(maxsize=4096)
+def _hash_file(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        while chunk := source.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_file(path: str) -> str:
+    """sha256 of a file, memoized until the file changes"""
+    stat = os.stat(path)
+    return _hash_file(path, stat.st_mtime_ns, stat.st_size)
+
+
+def derivative_name(sha256: str, width: int, fmt: str) -> str:
+    return f"{sha256[:2]}/{sha256[:20]}-w{width}.{fmt}"
+
+
+class ImageDecodeError(ValueError):
+    """An uploaded image that Pillow can't read: corrupt, truncated or too large"""
+
+
+def decode_resized(source_path: str, width: int, fmt: str) -> Image.Image:
+    """Load an image, oriented and resized (never upscaled) for one derivative"""
+    try:
+        with Image.open(source_path) as image:
+            image = ImageOps.exif_transpose(image)
+            if image.width > width:
+                image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            image.load()
+            return image
+    except FileNotFoundError:
+        raise
+    # Pillow reports undecodable data as OSError (truncated, unidentified),
+    # SyntaxError or ValueError from a format plugin, or a decompression bomb
+    except (Image.DecompressionBombError, OSError, SyntaxError, ValueError) as exc:
+        raise ImageDecodeError(str(exc)) from exc
+
+
+def render_derivative(source_path: str, target_path: str, width: int, fmt: str):
+    """Resize (never upscale) and encode one derivative, atomically"""
+    pil_format, options = FORMATS[fmt]
+    image = decode_resized(source_path, width, fmt)
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target_path), prefix=".derive-")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            image.save(buffer, pil_format, **options)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, target_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def source_sha256(source_url: str) -> str:
+    """sha256 of an uploaded image: read off its content-addressed key, else hashed"""
+    key = storage.key_from_url(source_url)
+    sha256 = parse_content_key(key) if key else None
+    if sha256:
+        return sha256
+    with open_upload(source_url) as path:
+        return hash_file(path)
+
+
+def get_derivative(
+    source_url: str,
+    width: int,
+    fmt: str,
+    sha256: Optional[str] = None,
+    source_path: Optional[str] = None
+) -> str:
+    """URL of a resized copy of an uploaded image, rendering it on first use.
+
+    The source is only fetched from storage when the copy has to be rendered.
+    Every hit refreshes the file's mtime, which is what eviction orders by.
+    """
+    sha256 = sha256 or source_sha256(source_url)
+    name = derivative_name(sha256, width, fmt)
+    target_path = os.path.join(UPLOAD_DIR, DERIVED_SUBDIR, name)
+
+    try:
+        os.utime(target_path)
+    except FileNotFoundError:
+        if source_path is None:
+            with open_upload(source_url) as path:
+                render_derivative(path, target_path, width, fmt)
+        else:
+            render_derivative(source_path, target_path, width, fmt)
+        maybe_evict()
+
+    return f"/uploads/{DERIVED_SUBDIR}/{name}"
+
+
+def generate_derivatives(source_url: str, subdir: str, sha256: Optional[str] = None) -> Dict[str, Dict[int, str]]:
+    """Pre-render every configured width in every available format (on upload)"""
+    with open_upload(source_url) as path:
+        return {
+            fmt: {
+                width: get_derivative(source_url, width, fmt, sha256, source_path=path)
+                for width in DERIVATIVE_WIDTHS[subdir]
+            }
+            for fmt in AVAILABLE_FORMATS
+        }
+
+
+# ===== Eviction =====
+_evict_lock = threading.Lock()
+_last_evicted = 0.0
+
+
+def evict_derivatives(max_bytes: int = IMAGE_CACHE_MAX_BYTES) -> int:
+    """Delete least recently used derivatives until the cache is under 90% of max_bytes"""
+    entries = []
+    total = 0
+    for root, _, files in os.walk(os.path.join(UPLOAD_DIR, DERIVED_SUBDIR)):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    removed = 0
+    if total <= max_bytes:
+        return removed
+
+    target = max_bytes * 9 // 10
+    for _, size, path in sorted(entries):
+        if total <= target:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def maybe_evict():
+    """Run eviction at most once per IMAGE_EVICT_INTERVAL per process"""
+    global _last_evicted
+    now = time.monotonic()
+    if now - _last_evicted < IMAGE_EVICT_INTERVAL or not _evict_lock.acquire(blocking=False):
+        return
+    try:
+        _last_evicted = now
+        evict_derivatives()
+    finally:
+        _evict_lock.release()
+
+
+def resolve_image_source(src: str) -> Optional[tuple]:
+    """(subdir, source URL) for an uploaded image URL that may be resized"""
+    key = storage.key_from_url(src)
+    if key is None and src.startswith("/uploads/"):
+        key = os.path.normpath(src.removeprefix("/uploads/"))
+    if key is None or key.startswith(".."):
+        return None
+
+    subdir = key.split("/", 1)[0]
+    return (subdir, src) if subdir in DERIVATIVE_WIDTHS else None
@@ -0,0 +1,245 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from app.utils.metrics import Counter, Gauge, Histogram, HistogramFamily
+from app.utils.tracing import start_statement_span
+
+# Seconds between event loop lag probes
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.5"))
+
+# Statements slower than this are logged with their route (0 disables)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG_CHARS = 1000
+
+# Request header asking for a SQL profile; honoured for admins only
+SQL_PROFILE_HEADER = b"x-sql-profile"
+SQL_PROFILE_TOP_STATEMENTS = 5
+
+logger = logging.getLogger("talesoul.sql")
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+LOOP_LAG_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+# Request metrics are only updated by the middleware, on the event loop
+# thread, so they skip locking
+REQUEST_DURATION = HistogramFamily(
+    "http_request_duration_seconds", "Request latency by route template", ("method", "route"), thread_safe=False
+)
+REQUESTS = Counter(
+    "http_requests_total", "Responses by route template and status", ("method", "route", "status"), thread_safe=False
+)
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "Requests being handled by this worker", thread_safe=False)
+REQUEST_DB_QUERIES = HistogramFamily(
+    "http_request_db_queries", "SQL statements per request", ("method", "route"), QUERY_COUNT_BUCKETS,
+    thread_safe=False
+)
+REQUEST_DB_SECONDS = HistogramFamily(
+    "http_request_db_seconds", "Time spent in SQL per request", ("method", "route"), thread_safe=False
+)
+DB_QUERY_DURATION = Histogram("db_query_duration_seconds", "SQL statement latency, all callers")
+EVENT_LOOP_LAG = Histogram("event_loop_lag_seconds", "Delay of a timer on the event loop", LOOP_LAG_BUCKETS)
+
+# Requests that matched no route (404s, static mounts) share one label
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestStats:
+    """Per-request counters filled in by the SQLAlchemy hooks
+
+    `statements` (statement -> [executions, seconds]) is only kept when the
+    request asked for a SQL profile.
+    """
+
+    __slots__ = ("scope", "queries", "db_seconds", "statements", "is_admin")
+
+    def __init__(self, scope: dict, profile: bool = False):
+        self.scope = scope
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = {} if profile else None
+        self.is_admin = False
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return route.path if route is not None else UNMATCHED_ROUTE
+
+    def duplicated_statements(self) -> list:
+        """(statement, executions, seconds) run more than once, most executed first"""
+        duplicates = [(sql, n, seconds) for sql, (n, seconds) in self.statements.items() if n > 1]
+        return sorted(duplicates, key=lambda item: (-item[1], -item[2]))
+
+    def profile(self, total_seconds: float) -> dict:
+        return {
+            "method": self.scope["method"],
+            "route": self.route,
+            "path": self.scope["path"],
+            "total_ms": round(total_seconds * 1000, 2),
+            "queries": self.queries,
+            "db_ms": round(self.db_seconds * 1000, 2),
+            "distinct_statements": len(self.statements),
+            "duplicated": [
+                {"statement": sql, "executions": n, "ms": round(seconds * 1000, 2)}
+                for sql, n, seconds in self.duplicated_statements()
+            ],
+        }
+
+    def server_timing(self, total_seconds: float) -> str:
+        """Server-Timing header value: total, db, and the most repeated statements"""
+        entries = [
+            f"total;dur={total_seconds * 1000:.2f}",
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} queries"',
+        ]
+        for index, (sql, n, seconds) in enumerate(self.duplicated_statements()[:SQL_PROFILE_TOP_STATEMENTS], 1):
+            summary = " ".join(sql.split())[:80].replace("\\", "").replace('"', "'")
+            entries.append(f'dup{index};dur={seconds * 1000:.2f};desc="{n}x {summary}"')
+        return ", ".join(entries)
+
+
+# Set for the duration of each request; thread pool calls run in a copy of
+# the context, so they see the same object
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+def allow_sql_profile(is_admin: bool):
+    """Called once the request's user is known; profiles are only returned to admins"""
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.is_admin = is_admin
+
+
+# ===== SQL =====
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    span = start_statement_span(statement, conn.dialect.name)
+    conn.info.setdefault("query_start", []).append((time.perf_counter(), span))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start, span = conn.info["query_start"].pop()
+    elapsed = time.perf_counter() - start
+    if span is not None:
+        span.end()
+    DB_QUERY_DURATION.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if stats.statements is not None:
+            entry = stats.statements.setdefault(statement, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        origin = f"{stats.scope['method']} {stats.route}" if stats is not None else "background"
+        logger.warning(
+            "Slow query (%.1f ms) from %s: %s", elapsed * 1000, origin, statement[:SLOW_QUERY_LOG_CHARS]
+        )
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute doesn't run for a failed statement
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start"):
+        _, span = connection.info["query_start"].pop()
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            span.end()
+
+
+def instrument_engine(engine):
+    """Time every statement run on a (sync) engine; pass `async_engine.sync_engine` for asyncio"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+# ===== HTTP =====
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and SQL usage per route template.
+
+    Labels use the matched route's path (`/api/v1/courses/{course_id}`), not
+    the raw URL, so the number of series stays bounded.
+
+    A request sent with `X-SQL-Profile: 1` by an admin also gets a
+    `Server-Timing` header (total, db and its most repeated statements), and
+    its full profile is logged.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes = {}  # (method, route) -> its three histograms
+
+    def route_histograms(self, method: str, path: str):
+        histograms = self._routes.get((method, path))
+        if histograms is None:
+            histograms = self._routes[(method, path)] = (
+                REQUEST_DURATION.labels(method, path),
+                REQUEST_DB_QUERIES.labels(method, path),
+                REQUEST_DB_SECONDS.labels(method, path),
+            )
+        return histograms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500  # Unless a response starts
+        profile = False
+        for name, value in scope["headers"]:
+            if name == SQL_PROFILE_HEADER:
+                profile = value not in (b"", b"0", b"false")
+                break
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if profile and stats.is_admin:
+                    elapsed = time.perf_counter() - start
+                    message["headers"] = [
+                        *message.get("headers", ()),
+                        (b"server-timing", stats.server_timing(elapsed).encode("latin-1", "replace")),
+                    ]
+                    logger.info("SQL profile: %s", json.dumps(stats.profile(elapsed)))
+            await send(message)
+
+        stats = RequestStats(scope, profile)
+        token = _request_stats.set(stats)
+        REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            REQUESTS_IN_PROGRESS.dec()
+            _request_stats.reset(token)
+
+            path = stats.route  # From the route FastAPI's router matched
+            method = scope["method"]
+            duration, queries, db_seconds = self.route_histograms(method, path)
+            duration.observe(elapsed)
+            queries.observe(stats.queries)
+            db_seconds.observe(stats.db_seconds)
+            REQUESTS.inc((method, path, status_code))
+
+
+# ===== Event Loop =====
+async def monitor_event_loop_lag(interval: float = LOOP_LAG_INTERVAL):
+    """Record how late a periodic timer fires; sustained lag means blocking code on the loop"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(loop.time() - start - interval, 0.0))
@@ -0,0 +1,59 @@
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import literal, tuple_
+
+# Upper bound on `limit` for every list endpoint
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a (created_at, id) position as an opaque URL-safe cursor"""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def paginate_keyset(query, model, cursor: Optional[str], limit: int, descending: bool = True):
+    """Order a query by (created_at, id) and start it after the cursor position.
+
+    Works for both ORM `Query` and 2.0-style `select()` objects. One extra row
+    is fetched so `build_page` can tell whether another page exists.
+    """
+    position = tuple_(model.created_at, model.id)
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        after = tuple_(literal(created_at, model.created_at.type), literal(row_id, model.id.type))
+        query = query.where(position < after if descending else position > after)
+
+    if descending:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at.asc(), model.id.asc())
+
+    return query.limit(limit + 1)
+
+
+def build_page(rows, limit: int) -> dict:
+    """Build the page envelope from rows fetched by `paginate_keyset`"""
+    items = list(rows[:limit])
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return {"items": items, "next_cursor": next_cursor}
@@ -0,0 +1,231 @@
+import hashlib
+import hmac
+import json
+import os
+import random
+import secrets
+import time
+from functools import lru_cache
+from typing import Mapping, NamedTuple, Optional
+
+
+class PaymentGatewayError(Exception):
+    """The provider rejected or failed a request; the message is safe to show"""
+
+
+class WebhookSignatureError(PaymentGatewayError):
+    pass
+
+
+class PaymentIntent(NamedTuple):
+    id: str  # Stripe PaymentIntent id, Razorpay order id, ...
+    client_secret: str  # What the frontend needs to collect the payment
+    amount_cents: int
+
+
+class WebhookEvent(NamedTuple):
+    id: str  # Provider event id; used to process each event once
+    type: str  # Provider event type, e.g. payment_intent.succeeded
+    payment_id: Optional[str]  # Matches PaymentIntent.id
+    succeeded: bool
+    metadata: dict  # The metadata passed to create_intent
+
+
+class PaymentGateway:
+    """A payment provider: creates payments and verifies its webhook events"""
+
+    name: str
+    currency: str
+    webhook_secret: str
+
+    def create_intent(
+        self,
+        amount_cents: int,
+        description: str,
+        metadata: Mapping[str, str],
+        idempotency_key: Optional[str] = None
+    ) -> PaymentIntent:
+        raise NotImplementedError
+
+    def parse_webhook(self, payload: bytes, headers: Mapping[str, str]) -> WebhookEvent:
+        """Verify a webhook delivery and normalize it; raises WebhookSignatureError"""
+        raise NotImplementedError
+
+
+# ===== Stripe =====
+def sign_stripe_payload(payload: bytes, secret: str, timestamp: int) -> str:
+    """Stripe-Signature header value for a payload (t=..., v1=HMAC-SHA256)"""
+    signature = hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def parse_stripe_event(event: Mapping) -> WebhookEvent:
+    intent = event["data"]["object"]
+    return WebhookEvent(
+        id=event["id"],
+        type=event["type"],
+        payment_id=intent.get("id"),
+        succeeded=event["type"] == "payment_intent.succeeded",
+        metadata=dict(intent.get("metadata") or {})
+    )
+
+
+class StripeGateway(PaymentGateway):
+    name = "stripe"
+    currency = "usd"
+
+    def __init__(self, api_key: str, webhook_secret: str = ""):
+        import stripe
+
+        self._stripe = stripe
+        self._stripe.api_key = api_key
+        self.webhook_secret = webhook_secret
+
+    def create_intent(self, amount_cents, description, metadata, idempotency_key=None) -> PaymentIntent:
+        try:
+            intent = self._stripe.PaymentIntent.create(
+                amount=amount_cents,
+                currency=self.currency,
+                description=description,
+                metadata=dict(metadata),
+                idempotency_key=idempotency_key
+            )
+        except self._stripe.error.StripeError as e:
+            raise PaymentGatewayError(f"Stripe error: {str(e)}")
+        return PaymentIntent(id=intent.id, client_secret=intent.client_secret, amount_cents=amount_cents)
+
+    def parse_webhook(self, payload, headers) -> WebhookEvent:
+        if not self.webhook_secret:
+            raise WebhookSignatureError("Webhook secret is not configured")
+        try:
+            event = self._stripe.Webhook.construct_event(
+                payload, headers.get("stripe-signature", ""), self.webhook_secret
+            )
+        except (ValueError, self._stripe.error.SignatureVerificationError):
+            raise WebhookSignatureError("Invalid webhook signature")
+        return parse_stripe_event(event)
+
+
+# ===== Razorpay =====
+class RazorpayGateway(PaymentGateway):
+    """Razorpay orders; the order id plays the role of the payment intent id"""
+
+    name = "razorpay"
+    currency = "INR"
+
+    def __init__(self, key_id: str, key_secret: str, webhook_secret: str = ""):
+        try:
+            import razorpay
+        except ImportError:
+            raise RuntimeError("The razorpay gateway requires the 'razorpay' package (pip install razorpay)")
+        if not key_id or not key_secret:
+            raise RuntimeError("RAZORPAY_KEY_ID and RAZORPAY_KEY_SECRET must be set to use the razorpay gateway")
+
+        self._client = razorpay.Client(auth=(key_id, key_secret))
+        self._error = razorpay.errors.BadRequestError
+        self.key_id = key_id
+        self.webhook_secret = webhook_secret
+
+    def create_intent(self, amount_cents, description, metadata, idempotency_key=None) -> PaymentIntent:
+        # Razorpay dedupes on `receipt` rather than an idempotency header
+        receipt = (idempotency_key or secrets.token_hex(8))[:40]
+        try:
+            order = self._client.order.create({
+                "amount": amount_cents,
+                "currency": self.currency,
+                "receipt": receipt,
+                "notes": {**metadata, "description": description[:250]},
+            })
+        except self._error as e:
+            raise PaymentGatewayError(f"Razorpay error: {str(e)}")
+        # Checkout.js is opened with the public key id and the order id
+        return PaymentIntent(id=order["id"], client_secret=order["id"], amount_cents=amount_cents)
+
+    def parse_webhook(self, payload, headers) -> WebhookEvent:
+        if not self.webhook_secret:
+            raise WebhookSignatureError("Webhook secret is not configured")
+        expected = hmac.new(self.webhook_secret.encode(), payload, hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, headers.get("x-razorpay-signature", "")):
+            raise WebhookSignatureError("Invalid webhook signature")
+
+        event = json.loads(payload)
+        payment = event.get("payload", {}).get("payment", {}).get("entity", {})
+        return WebhookEvent(
+            id=headers.get("x-razorpay-event-id") or f"{event['event']}:{payment.get('id')}",
+            type=event["event"],
+            payment_id=payment.get("order_id"),
+            succeeded=event["event"] in ("payment.captured", "order.paid"),
+            metadata=dict(payment.get("notes") or {})
+        )
+
+
+# ===== Fake =====
+class FakeGateway(PaymentGateway):
+    """In-process stand-in for load tests and offline development.
+
+    Never contacts a provider. `latency_ms` (plus up to `jitter_ms`) is
+    slept on every create, and `failure_rate` of creates fail, to mimic a
+    slow or flaky provider. Webhooks use Stripe's event shape and signature
+    scheme with `webhook_secret`, so scripts/emit_stripe_event.py can
+    complete a fake payment.
+    """
+
+    name = "fake"
+    currency = "usd"
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, failure_rate: float = 0, webhook_secret: str = ""):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.webhook_secret = webhook_secret
+
+    def create_intent(self, amount_cents, description, metadata, idempotency_key=None) -> PaymentIntent:
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+        if random.random() < self.failure_rate:
+            raise PaymentGatewayError("Fake gateway error: injected failure")
+
+        # Same key, same id, as with Stripe's idempotency keys
+        if idempotency_key:
+            payment_id = "pi_fake_" + hashlib.sha256(idempotency_key.encode()).hexdigest()[:24]
+        else:
+            payment_id = "pi_fake_" + secrets.token_hex(12)
+        return PaymentIntent(
+            id=payment_id, client_secret=f"{payment_id}_secret_{secrets.token_hex(8)}", amount_cents=amount_cents
+        )
+
+    def parse_webhook(self, payload, headers) -> WebhookEvent:
+        header = headers.get("stripe-signature", "")
+        fields = dict(part.split("=", 1) for part in header.split(",") if "=" in part)
+        try:
+            expected = sign_stripe_payload(payload, self.webhook_secret, int(fields.get("t", "")))
+        except ValueError:
+            raise WebhookSignatureError("Invalid webhook signature")
+        if not self.webhook_secret or not hmac.compare_digest(expected, header):
+            raise WebhookSignatureError("Invalid webhook signature")
+        return parse_stripe_event(json.loads(payload))
+
+
+@lru_cache(maxsize=None)
+def get_gateway(name: str) -> PaymentGateway:
+    """Build (once per process) a payment gateway by name ("stripe", "razorpay" or "fake")"""
+    if name == "stripe":
+        return StripeGateway(
+            os.getenv("STRIPE_SECRET_KEY", "sk_test_your_stripe_secret_key"),
+            webhook_secret=os.getenv("STRIPE_WEBHOOK_SECRET", "")
+        )
+    if name == "razorpay":
+        return RazorpayGateway(
+            os.getenv("RAZORPAY_KEY_ID", ""),
+            os.getenv("RAZORPAY_KEY_SECRET", ""),
+            webhook_secret=os.getenv("RAZORPAY_WEBHOOK_SECRET", "")
+        )
+    if name == "fake":
+        return FakeGateway(
+            latency_ms=float(os.getenv("FAKE_PAYMENT_LATENCY_MS", "0")),
+            jitter_ms=float(os.getenv("FAKE_PAYMENT_JITTER_MS", "0")),
+            failure_rate=float(os.getenv("FAKE_PAYMENT_FAILURE_RATE", "0")),
+            webhook_secret=os.getenv("FAKE_PAYMENT_WEBHOOK_SECRET", "whsec_fake")
+        )
+    raise ValueError(f"Unknown payment gateway: {name}")
@@ -0,0 +1,78 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+# Stacks whose innermost frame is one of these are threads waiting for work
+# (idle thread pool workers, the event loop in select()), not using CPU
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("runners.py", "run"),  # uvloop waits for events in C, right below asyncio.run()
+}
+
+MAX_STACK_DEPTH = 128
+
+# One profile at a time per worker; the sampling itself is the only cost
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collect_stack(frame, include_idle: bool = False) -> Optional[list]:
+    """Frames of one thread, outermost first; None if the thread is idle"""
+    code = frame.f_code
+    if not include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+        return None
+
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        stack.append(frame_label(frame.f_code))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def sample_stacks(seconds: float, interval: float, include_idle: bool = False) -> Counter:
+    """Sample every thread's stack each `interval` for `seconds` (blocking)
+
+    Returns collapsed stacks ("thread;outer;...;inner") mapped to how many
+    samples saw them. Nothing runs between calls; while sampling, the cost
+    is one sys._current_frames() walk per interval.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy()
+
+    try:
+        own_id = threading.get_ident()
+        counts = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = collect_stack(frame, include_idle)
+                if stack is None:
+                    continue
+                thread_name = names.get(thread_id, str(thread_id)).replace(";", ":")
+                counts[";".join([thread_name, *stack])] += 1
+            time.sleep(interval)
+        return counts
+    finally:
+        _profile_lock.release()
+
+
+def format_collapsed(counts: Counter) -> str:
+    """Brendan Gregg's collapsed format, as read by flamegraph.pl and speedscope"""
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
@@ -0,0 +1,211 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+
+def content_key(subdir: str, sha256: str, extension: str) -> str:
+    """Storage key for a blob, addressed by its content hash.
+
+    Identical uploads map to the same key (deduplication), and a key's bytes
+    never change, so its URL can be cached as immutable.
+    """
+    return f"{subdir}/{sha256[:2]}/{sha256}.{extension.lower()}"
+
+
+def parse_content_key(key: str) -> Optional[str]:
+    """sha256 of a content-addressed key, or None for a legacy upload path"""
+    name = os.path.basename(key).split(".", 1)[0]
+    if len(name) == 64 and all(c in "0123456789abcdef" for c in name):
+        return name
+    return None
+
+
+class StorageBackend:
+    """Blob store for uploaded files, addressed by key (`subdir/ab/<sha256>.ext`)"""
+
+    # Directory for temp files while an upload is received; must be on the
+    # same filesystem as the blobs for LocalStorage's rename to be atomic
+    staging_dir: str
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def put(self, source_path: str, key: str, content_type: Optional[str] = None) -> bool:
+        """Store a finished local file under `key`, consuming it.
+
+        Returns False when the blob already existed and the file was discarded.
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def url(self, key: str) -> str:
+        raise NotImplementedError
+
+    def key_from_url(self, url: str) -> Optional[str]:
+        """Inverse of url(); None when the URL is not one of this backend's"""
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Path on this machine's disk, when the backend keeps one"""
+        return None
+
+    def presigned_url(self, key: str, expires_in: int) -> Optional[str]:
+        """Time-limited direct URL for a private blob, when the backend has one"""
+        return None
+
+    def download(self, key: str, target_path: str):
+        raise NotImplementedError
+
+    @contextmanager
+    def open_local(self, key: str) -> Iterator[str]:
+        """Yield a local path for the blob, downloading it to a temp file if needed"""
+        path = self.local_path(key)
+        if path is not None:
+            yield path
+            return
+
+        fd, temp_path = tempfile.mkstemp(prefix=".fetch-", suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            self.download(key, temp_path)
+            yield temp_path
+        finally:
+            os.unlink(temp_path)
+
+
+class LocalStorage(StorageBackend):
+    """Blobs under a local directory that nginx serves as /uploads/"""
+
+    def __init__(self, root: str, url_prefix: str = "/uploads/"):
+        self.root = root
+        self.url_prefix = url_prefix
+        self.staging_dir = os.path.join(root, ".staging")
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.local_path(key))
+
+    def put(self, source_path: str, key: str, content_type: Optional[str] = None) -> bool:
+        target_path = self.local_path(key)
+        if os.path.exists(target_path):
+            os.unlink(source_path)
+            return False
+
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        os.chmod(source_path, 0o644)  # mkstemp creates 0600; nginx serves these files
+        os.replace(source_path, target_path)
+        return True
+
+    def delete(self, key: str):
+        try:
+            os.unlink(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+    def url(self, key: str) -> str:
+        return self.url_prefix + key
+
+    def key_from_url(self, url: str) -> Optional[str]:
+        if not url.startswith(self.url_prefix):
+            return None
+        key = os.path.normpath(url[len(self.url_prefix):]).lstrip("/")
+        return None if key.startswith("..") else key
+
+    def download(self, key: str, target_path: str):
+        raise FileNotFoundError(key)  # Always local; open_local() never gets here
+
+
+class S3Storage(StorageBackend):
+    """Blobs in an S3-compatible bucket (AWS S3, MinIO, R2, ...)
+
+    Public prefixes (thumbnails, profile pictures) are served straight from
+    `public_url`; private ones (course videos) through presigned URLs.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        public_url: Optional[str] = None,
+        staging_dir: Optional[str] = None,
+    ):
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise RuntimeError("The s3 storage backend requires the 'boto3' package (pip install boto3)")
+
+        self.bucket = bucket
+        self.public_url = (public_url or f"{endpoint_url or 'https://s3.amazonaws.com'}/{bucket}").rstrip("/") + "/"
+        self.staging_dir = staging_dir or tempfile.gettempdir()
+        self._client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self._client_error = ClientError
+
+    def exists(self, key: str) -> bool:
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except self._client_error as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put(self, source_path: str, key: str, content_type: Optional[str] = None) -> bool:
+        try:
+            if self.exists(key):
+                return False
+            extra_args = {"CacheControl": "public, max-age=31536000, immutable"}
+            if content_type:
+                extra_args["ContentType"] = content_type
+            self._client.upload_file(source_path, self.bucket, key, ExtraArgs=extra_args)
+            return True
+        finally:
+            os.unlink(source_path)
+
+    def delete(self, key: str):
+        self._client.delete_object(Bucket=self.bucket, Key=key)
+
+    def url(self, key: str) -> str:
+        return self.public_url + key
+
+    def key_from_url(self, url: str) -> Optional[str]:
+        if not url.startswith(self.public_url):
+            return None
+        return url[len(self.public_url):]
+
+    def presigned_url(self, key: str, expires_in: int) -> str:
+        return self._client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": key}, ExpiresIn=expires_in
+        )
+
+    def download(self, key: str, target_path: str):
+        try:
+            self._client.download_file(self.bucket, key, target_path)
+        except self._client_error as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                raise FileNotFoundError(key)
+            raise
+
+
+def create_storage(backend: str, upload_dir: str) -> StorageBackend:
+    """Build a storage backend by name ("local" or "s3")"""
+    if backend == "local":
+        return LocalStorage(upload_dir)
+    if backend == "s3":
+        bucket = os.getenv("S3_BUCKET")
+        if not bucket:
+            raise RuntimeError("S3_BUCKET must be set to use the s3 storage backend")
+        return S3Storage(
+            bucket,
+            endpoint_url=os.getenv("S3_ENDPOINT_URL") or None,
+            region=os.getenv("S3_REGION") or None,
+            public_url=os.getenv("S3_PUBLIC_URL") or None,
+            staging_dir=os.getenv("UPLOAD_STAGING_DIR") or None,
+        )
+    raise ValueError(f"Unknown storage backend: {backend}")
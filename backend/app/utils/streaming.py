@@ -0,0 +1,201 @@
+import mimetypes
+import os
+import posixpath
+from datetime import datetime, timedelta
+from email.utils import formatdate
+from typing import Optional, Tuple
+
+import anyio
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import RedirectResponse, StreamingResponse
+from jose import JWTError, jwt
+
+from app.utils.uploads import UPLOAD_DIR, storage
+
+SECRET_KEY = os.getenv("SECRET_KEY", "your-super-secret-key-change-this-in-production")
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
+STREAM_TOKEN_EXPIRE_MINUTES = int(os.getenv("STREAM_TOKEN_EXPIRE_MINUTES", "240"))
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", str(512 * 1024)))
+
+# When set (e.g. "/protected-uploads/"), hand the file to nginx with
+# X-Accel-Redirect instead of streaming it from Python
+STREAM_ACCEL_REDIRECT_PREFIX = os.getenv("STREAM_ACCEL_REDIRECT_PREFIX", "")
+
+STREAM_TOKEN_SCOPE = "stream"
+
+# HLS segments; the platform table often maps .ts to TypeScript
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("video/mp2t", ".ts")
+
+
+# ===== Stream Tokens =====
+def create_stream_token(course_id: int, video_url: str) -> Tuple[str, datetime]:
+    """Signed, short-lived grant to read one course video.
+
+    The token carries the file path, so range requests are authorized by the
+    signature alone, with no database lookup. It has no `sub` claim and is
+    therefore rejected as an API access token.
+    """
+    expires_at = datetime.utcnow() + timedelta(minutes=STREAM_TOKEN_EXPIRE_MINUTES)
+    claims = {"scope": STREAM_TOKEN_SCOPE, "course_id": course_id, "path": video_url, "exp": expires_at}
+    return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM), expires_at
+
+
+def create_stream_path(course_id: int, video_url: str) -> Tuple[str, datetime]:
+    """Stream URL path (below the courses router) for a course video.
+
+    HLS players fetch rendition playlists and segments relative to the
+    manifest, so for `.m3u8` videos the token is embedded in the path and
+    grants the manifest's whole directory.
+    """
+    if video_url.endswith(".m3u8"):
+        directory, manifest = posixpath.split(video_url)
+        token, expires_at = create_stream_token(course_id, directory + "/")
+        return f"/{course_id}/stream/{token}/{manifest}", expires_at
+
+    token, expires_at = create_stream_token(course_id, video_url)
+    return f"/{course_id}/stream?token={token}", expires_at
+
+
+def verify_stream_token(token: str, course_id: int) -> str:
+    """Return the video URL a stream token grants access to"""
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired stream token"
+        )
+
+    if claims.get("scope") != STREAM_TOKEN_SCOPE or claims.get("course_id") != course_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Stream token is not valid for this course"
+        )
+
+    return claims["path"]
+
+
+def resolve_granted_url(granted: str, file_path: str) -> str:
+    """URL of a file inside the directory a stream token grants"""
+    url = posixpath.normpath(granted + file_path)
+    if not granted.endswith("/") or not url.startswith(granted):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Stream token is not valid for this file"
+        )
+    return url
+
+
+# ===== Range Responses =====
+def resolve_upload_path(url: str) -> str:
+    """Map an `/uploads/...` URL to its path relative to UPLOAD_DIR"""
+    relative = os.path.normpath(url.removeprefix("/uploads/")).lstrip("/")
+    if relative.startswith(".."):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video not found")
+    return relative
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=` range into inclusive (start, end).
+
+    Returns None when the header should be ignored (malformed or multiple
+    ranges), in which case the whole file is sent. Raises 416 when the range
+    starts past the end of the file.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    if start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    if start > end:
+        return None
+    return start, min(end, size - 1)
+
+
+async def iter_file(path: str, start: int, end: int):
+    """Yield bytes start..end (inclusive) using positional reads off the event loop"""
+    fd = await anyio.to_thread.run_sync(os.open, path, os.O_RDONLY)
+    try:
+        offset = start
+        while offset <= end:
+            data = await anyio.to_thread.run_sync(os.pread, fd, min(STREAM_CHUNK_SIZE, end - offset + 1), offset)
+            if not data:
+                break
+            offset += len(data)
+            yield data
+    finally:
+        os.close(fd)
+
+
+def file_range_response(request: Request, url: str) -> Response:
+    """Serve an uploaded file with Range, If-Range, ETag and 206 support"""
+    key = storage.key_from_url(url)
+    if key is not None and storage.local_path(key) is None:
+        # Remote blob: the object store serves ranges itself
+        expires_in = STREAM_TOKEN_EXPIRE_MINUTES * 60
+        return RedirectResponse(
+            storage.presigned_url(key, expires_in),
+            headers={"Cache-Control": "private, max-age=60"}
+        )
+
+    relative = resolve_upload_path(url)
+    media_type = mimetypes.guess_type(relative)[0] or "application/octet-stream"
+
+    if STREAM_ACCEL_REDIRECT_PREFIX:
+        # nginx serves the file (ranges, sendfile) from an internal location
+        return Response(
+            headers={"X-Accel-Redirect": STREAM_ACCEL_REDIRECT_PREFIX + relative},
+            media_type=media_type
+        )
+
+    path = os.path.join(UPLOAD_DIR, relative)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video not found")
+    stat = os.stat(path)
+
+    size = stat.st_size
+    etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        # Token-gated, so only the viewer's browser may cache it
+        "Cache-Control": "private, max-age=3600",
+    }
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range in (etag, last_modified)):
+        byte_range = parse_range(range_header, size)
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, status.HTTP_200_OK
+    else:
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(iter_file(path, start, end), status_code=status_code, headers=headers, media_type=media_type)
@@ -0,0 +1,62 @@
+import html
+import re
+from typing import Iterable, List, Mapping, Optional
+
+_PLACEHOLDER = re.compile(r"\{\{\s*(\w+)(\|raw)?\s*\}\}")
+
+
+class CompiledTemplate:
+    """A template parsed once into static text and placeholder slots.
+
+    `{{ name }}` is HTML-escaped when the template is compiled with
+    `escape=True`; `{{ name|raw }}` is always inserted as-is. Rendering
+    copies the prebuilt parts list, fills the slots and joins it once, so
+    the static text (markup, CSS) is never rebuilt or copied per render.
+    """
+
+    __slots__ = ("_parts", "_slots", "fields")
+
+    def __init__(self, source: str, escape: bool = True):
+        parts = []
+        slots = []  # (index into parts, field name, escape?)
+        position = 0
+        for match in _PLACEHOLDER.finditer(source):
+            parts.append(source[position:match.start()])
+            slots.append((len(parts), match.group(1), escape and not match.group(2)))
+            parts.append("")
+            position = match.end()
+        parts.append(source[position:])
+
+        self._parts = parts
+        self._slots = tuple(slots)
+        self.fields = frozenset(field for _, field, _ in slots)
+
+    def _fill(self, parts: list, slots: Iterable[tuple], context: Mapping):
+        for index, field, escaped in slots:
+            value = str(context[field])
+            parts[index] = html.escape(value) if escaped else value
+
+    def render(self, context: Mapping) -> str:
+        parts = self._parts.copy()
+        self._fill(parts, self._slots, context)
+        return "".join(parts)
+
+    def render_many(self, contexts: Iterable[Mapping], shared: Optional[Mapping] = None) -> List[str]:
+        """Render once per recipient context.
+
+        Fields in `shared` (the same for every recipient) are filled and
+        escaped once up front; only the remaining slots are filled per render.
+        """
+        parts = self._parts
+        slots = self._slots
+        if shared:
+            parts = parts.copy()
+            self._fill(parts, [slot for slot in slots if slot[1] in shared], shared)
+            slots = tuple(slot for slot in slots if slot[1] not in shared)
+
+        rendered = []
+        for context in contexts:
+            filled = parts.copy()
+            self._fill(filled, slots, context)
+            rendered.append("".join(filled))
+        return rendered
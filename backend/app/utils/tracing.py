@@ -0,0 +1,361 @@
+import json
+import logging
+import os
+import queue
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+# none (default), stdout, file or otlp
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "none")
+# Share of requests traced when the caller didn't decide (no sampled traceparent)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "traces.jsonl")
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318").rstrip("/")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "talesoul-backend")
+
+TRACE_BATCH_SIZE = 512
+TRACE_FLUSH_INTERVAL = 5.0
+TRACE_QUEUE_SIZE = 10000
+DB_STATEMENT_MAX_CHARS = 2000
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_TRACE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+logger = logging.getLogger("talesoul.tracing")
+
+
+class Span:
+    """One timed operation in a trace"""
+
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, kind: int, trace_id: str, parent_id: Optional[str] = None, attributes=None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes) if attributes else {}
+        self.error = None
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException):
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def child(self, name: str, kind: int = SPAN_KIND_INTERNAL, attributes=None) -> "Span":
+        return Span(name, kind, self.trace_id, self.span_id, attributes)
+
+    def end(self):
+        self.end_ns = time.time_ns()
+        if _processor is not None:
+            _processor.submit(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+# ===== Exporters =====
+class SpanExporter:
+    def export(self, spans: List[Span]):
+        raise NotImplementedError
+
+
+class StdoutExporter(SpanExporter):
+    """One JSON object per span on stdout"""
+
+    def export(self, spans):
+        sys.stdout.write("".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans))
+        sys.stdout.flush()
+
+
+class FileExporter(SpanExporter):
+    """One JSON object per span, appended to a file"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans):
+        with open(self.path, "a") as file:
+            file.write("".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans))
+
+
+def otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPExporter(SpanExporter):
+    """OTLP/HTTP with JSON encoding (Jaeger, Tempo, an OpenTelemetry Collector, ...)"""
+
+    def __init__(self, endpoint: str, service_name: str):
+        self.url = f"{endpoint}/v1/traces"
+        self.resource = {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]}
+
+    def encode(self, span: Span) -> dict:
+        encoded = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": key, "value": otlp_value(value)} for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 0},
+        }
+        if span.parent_id:
+            encoded["parentSpanId"] = span.parent_id
+        return encoded
+
+    def export(self, spans):
+        body = {"resourceSpans": [{
+            "resource": self.resource,
+            "scopeSpans": [{"scope": {"name": "talesoul"}, "spans": [self.encode(span) for span in spans]}],
+        }]}
+        request = urllib.request.Request(
+            self.url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=10) as response:
+            response.read()
+
+
+def create_exporter(name: str) -> Optional[SpanExporter]:
+    """Build a span exporter by name ("none", "stdout", "file" or "otlp")"""
+    if name == "none":
+        return None
+    if name == "stdout":
+        return StdoutExporter()
+    if name == "file":
+        return FileExporter(TRACE_EXPORT_FILE)
+    if name == "otlp":
+        return OTLPExporter(OTLP_ENDPOINT, SERVICE_NAME)
+    raise ValueError(f"Unknown trace exporter: {name}")
+
+
+class BatchSpanProcessor:
+    """Queues finished spans and exports them in batches from a background thread
+
+    Ending a span never blocks on the exporter; when the queue is full the
+    span is dropped. The thread is started on first use in each process, so
+    it survives gunicorn's fork.
+    """
+
+    def __init__(self, exporter: SpanExporter):
+        self.exporter = exporter
+        self.queue = queue.Queue(maxsize=TRACE_QUEUE_SIZE)
+        self.dropped = 0
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def submit(self, span: Span):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.queue = queue.Queue(maxsize=TRACE_QUEUE_SIZE)  # Don't inherit a parent's backlog
+            threading.Thread(target=self._run, name="trace-exporter", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _drain(self, timeout: Optional[float]) -> List[Span]:
+        batch = []
+        try:
+            batch.append(self.queue.get(timeout=timeout))
+            while len(batch) < TRACE_BATCH_SIZE:
+                batch.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _export(self, batch: List[Span]):
+        try:
+            self.exporter.export(batch)
+        except Exception as exc:
+            logger.warning("Dropped %s spans: export failed: %s", len(batch), exc)
+
+    def _run(self):
+        while True:
+            batch = self._drain(TRACE_FLUSH_INTERVAL)
+            if batch:
+                self._export(batch)
+
+    def flush(self):
+        """Export whatever is queued now (at shutdown)"""
+        while True:
+            batch = self._drain(0)
+            if not batch:
+                return
+            self._export(batch)
+
+
+_exporter = create_exporter(TRACE_EXPORTER)
+_processor = BatchSpanProcessor(_exporter) if _exporter is not None else None
+_sample_rate = TRACE_SAMPLE_RATE
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def configure_tracing(exporter: Optional[SpanExporter], sample_rate: float = TRACE_SAMPLE_RATE):
+    """Replace the exporter and sample rate chosen from the environment"""
+    global _exporter, _processor, _sample_rate
+    _exporter = exporter
+    _processor = BatchSpanProcessor(exporter) if exporter is not None else None
+    _sample_rate = sample_rate
+
+
+def flush_tracing():
+    if _processor is not None:
+        _processor.flush()
+
+
+def current_span() -> Optional[Span]:
+    """The active span, or None when this request or job is not being traced"""
+    return _current_span.get()
+
+
+def start_child_span(name: str, kind: int = SPAN_KIND_INTERNAL, attributes=None) -> Optional[Span]:
+    """A child of the active span, not made current; the caller ends it"""
+    parent = _current_span.get()
+    return parent.child(name, kind, attributes) if parent is not None else None
+
+
+@contextmanager
+def start_span(name: str, kind: int = SPAN_KIND_INTERNAL, attributes=None, root: bool = False) -> Iterator[Optional[Span]]:
+    """Trace a block as a child of the active span.
+
+    Without an active span nothing is recorded, unless `root` is set: then a
+    new trace is started for TRACE_SAMPLE_RATE of calls (background jobs).
+    Yields the span, or None when not tracing.
+    """
+    parent = _current_span.get()
+    if parent is not None:
+        span = parent.child(name, kind, attributes)
+    elif root and _processor is not None and random.random() < _sample_rate:
+        span = Span(name, kind, secrets.token_hex(16), None, attributes)
+    else:
+        yield None
+        return
+
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.record_exception(exc)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+
+
+# ===== HTTP =====
+class TracingMiddleware:
+    """ASGI middleware starting a server span per sampled request.
+
+    Follows W3C trace context: a `traceparent` header (forwarded by nginx)
+    continues the caller's trace and its sampled flag decides. Otherwise
+    TRACE_SAMPLE_RATE of requests start a trace, using nginx's X-Request-ID
+    as the trace id so traces and access logs can be joined.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _processor is None:
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = request_id = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1").strip().lower()
+            elif name == b"x-request-id":
+                request_id = value.decode("latin-1").strip().lower()
+
+        match = _TRACEPARENT.match(traceparent) if traceparent else None
+        if match:
+            trace_id, parent_id, flags = match.groups()
+            sampled = int(flags, 16) & 1
+        else:
+            trace_id = request_id if request_id and _TRACE_ID.match(request_id) else secrets.token_hex(16)
+            parent_id = None
+            sampled = random.random() < _sample_rate
+        if not sampled:
+            await self.app(scope, receive, send)
+            return
+
+        span = Span(scope["method"], SPAN_KIND_SERVER, trace_id, parent_id, {
+            "http.request.method": scope["method"],
+            "url.path": scope["path"],
+        })
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.response.status_code", message["status"])
+                if message["status"] >= 500:
+                    span.error = span.error or f"HTTP {message['status']}"
+            await send(message)
+
+        token = _current_span.set(span)
+        try:
+            await self.app(scope, receive, send_with_status)
+        except BaseException as exc:
+            span.attributes.setdefault("http.response.status_code", 500)
+            span.record_exception(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                span.name = f"{scope['method']} {route.path}"
+                span.set_attribute("http.route", route.path)
+            span.end()
+
+
+# ===== SQL =====
+def start_statement_span(statement: str, db_system: str) -> Optional[Span]:
+    """Client span for one SQL statement; None unless the caller is being traced"""
+    if _current_span.get() is None:
+        return None
+    words = statement.split(None, 1)
+    return start_child_span(words[0].upper() if words else "SQL", SPAN_KIND_CLIENT, {
+        "db.system": db_system,
+        "db.statement": statement[:DB_STATEMENT_MAX_CHARS],
+    })
@@ -0,0 +1,203 @@
+import hashlib
+import mimetypes
+import os
+import secrets
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import AsyncIterator, Dict, Iterator, NamedTuple, Optional
+
+import anyio
+from fastapi import HTTPException, UploadFile, status
+
+from app.utils.storage import content_key, create_storage
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "/app/uploads")
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+MAX_VIDEO_UPLOAD_BYTES = int(os.getenv("MAX_VIDEO_UPLOAD_MB", "500")) * 1024 * 1024
+MAX_IMAGE_UPLOAD_BYTES = int(os.getenv("MAX_IMAGE_UPLOAD_MB", "10")) * 1024 * 1024
+
+# Resumable uploads keep their chunks here, outside the publicly served UPLOAD_DIR
+RESUMABLE_UPLOAD_DIR = os.getenv("RESUMABLE_UPLOAD_DIR", "/app/upload_sessions")
+
+# Where uploaded blobs live: "local" (UPLOAD_DIR, served by nginx) or "s3"
+storage = create_storage(os.getenv("STORAGE_BACKEND", "local"), UPLOAD_DIR)
+
+
+class StoredUpload(NamedTuple):
+    key: str
+    url: str
+    size: int
+    sha256: str
+    created: bool  # False when an identical blob was already stored
+
+
+def upload_extension(filename: Optional[str], default: str) -> str:
+    """Lowercased extension of a client-supplied filename, safe to use in a key"""
+    extension = os.path.splitext(filename or "")[1][1:].lower()
+    return extension if extension.isalnum() and len(extension) <= 8 else default
+
+
+def store_staged_file(temp_path: str, subdir: str, extension: str, size: int, sha256: str) -> StoredUpload:
+    """Hand a fully written temp file to the storage backend under its content key"""
+    key = content_key(subdir, sha256, extension)
+    created = storage.put(temp_path, key, mimetypes.guess_type(key)[0])
+    return StoredUpload(key=key, url=storage.url(key), size=size, sha256=sha256, created=created)
+
+
+def save_upload(file: UploadFile, subdir: str, extension: str, max_bytes: Optional[int] = None) -> StoredUpload:
+    """Stream an upload into storage at `subdir/ab/<sha256>.extension`.
+
+    Peak memory is one chunk regardless of file size. The data goes to a temp
+    file in the staging directory and is stored only once complete, so
+    readers never see a partial file. Re-uploading identical bytes reuses the
+    existing blob. Call from a sync handler (worker thread).
+    """
+    os.makedirs(storage.staging_dir, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=storage.staging_dir, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while True:
+                chunk = file.file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"File exceeds the {max_bytes // (1024 * 1024)} MB limit"
+                    )
+                digest.update(chunk)
+                buffer.write(chunk)
+
+        return store_staged_file(temp_path, subdir, extension, size, digest.hexdigest())
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+@contextmanager
+def open_upload(url: str) -> Iterator[str]:
+    """Yield a local path for an uploaded file URL, fetching it from storage if needed.
+
+    Legacy `/uploads/...` URLs written before content addressing always
+    resolve to UPLOAD_DIR, whichever backend is configured.
+    """
+    key = storage.key_from_url(url)
+    if key is not None:
+        with storage.open_local(key) as path:
+            yield path
+        return
+
+    if not url.startswith("/uploads/"):
+        raise FileNotFoundError(url)
+    relative = os.path.normpath(url.removeprefix("/uploads/")).lstrip("/")
+    if relative.startswith(".."):
+        raise FileNotFoundError(url)
+    yield os.path.join(UPLOAD_DIR, relative)
+
+
+# ===== Resumable Uploads =====
+def get_session_dir(upload_id: str) -> str:
+    return os.path.join(RESUMABLE_UPLOAD_DIR, upload_id)
+
+
+def create_session_dir(upload_id: str):
+    os.makedirs(get_session_dir(upload_id), exist_ok=True)
+
+
+def remove_session_dir(upload_id: str):
+    shutil.rmtree(get_session_dir(upload_id), ignore_errors=True)
+
+
+def list_received_chunks(upload_id: str) -> Dict[int, int]:
+    """Map of chunk index -> size for every fully received chunk"""
+    chunks = {}
+    try:
+        entries = list(os.scandir(get_session_dir(upload_id)))
+    except FileNotFoundError:
+        return chunks
+
+    for entry in entries:
+        index, _, suffix = entry.name.partition(".")
+        if suffix == "part" and index.isdigit():
+            chunks[int(index)] = entry.stat().st_size
+    return chunks
+
+
+async def write_chunk(upload_id: str, index: int, body: AsyncIterator[bytes], expected_size: int) -> int:
+    """Stream one chunk from the request body to disk without blocking the event loop.
+
+    The chunk is written under a unique temp name and renamed into place, so
+    a retried or concurrent PUT of the same index never leaves a torn chunk.
+    Raises 409 if the session is completed or aborted (its directory
+    removed) while the chunk is in flight.
+    """
+    part_path = os.path.join(get_session_dir(upload_id), f"{index}.part")
+    temp_path = f"{part_path}.{secrets.token_hex(4)}.tmp"
+
+    size = 0
+    try:
+        async with await anyio.open_file(temp_path, "wb") as buffer:
+            async for piece in body:
+                size += len(piece)
+                if size > expected_size:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"Chunk {index} must be {expected_size} bytes"
+                    )
+                await buffer.write(piece)
+
+        if size != expected_size:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Chunk {index} must be {expected_size} bytes, received {size}"
+            )
+        os.replace(temp_path, part_path)
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Upload session is already closed"
+        )
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+    return size
+
+
+def assemble_chunks(upload_id: str, total_chunks: int, subdir: str, extension: str) -> StoredUpload:
+    """Concatenate received chunks into storage at `subdir/ab/<sha256>.extension`.
+
+    Each chunk is copied in UPLOAD_CHUNK_SIZE pieces and hashed on the way,
+    since the content hash is the storage key. The session directory is
+    removed afterwards.
+    """
+    os.makedirs(storage.staging_dir, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=storage.staging_dir, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            for index in range(total_chunks):
+                chunk_path = os.path.join(get_session_dir(upload_id), f"{index}.part")
+                with open(chunk_path, "rb") as chunk:
+                    while piece := chunk.read(UPLOAD_CHUNK_SIZE):
+                        digest.update(piece)
+                        buffer.write(piece)
+                        size += len(piece)
+
+        stored = store_staged_file(temp_path, subdir, extension, size, digest.hexdigest())
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+    remove_session_dir(upload_id)
+    return stored
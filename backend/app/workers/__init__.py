@@ -0,0 +1 @@
+# Background workers (run as separate processes)
@@ -0,0 +1,230 @@
+"""Notification digest job.
+
+Each run sends every affected user one email that covers:
+- replies to their community posts since the previous run, and
+- their confirmed sessions (as learner or mentor) starting within
+  DIGEST_REMINDER_HOURS that have not been reminded yet.
+
+The work is a fixed handful of set-based queries however many users are
+involved. Rendering is linear in the number of items, and the emails go to
+the outbox in one insert for the mailer worker (app.workers.mailer) to
+deliver. Runs are serialized by a row lock on the watermark, so overlapping
+runs never send a reply twice.
+
+Replies are covered in (created_at, id) order, and only once they are
+DIGEST_COMMIT_LAG seconds old. Ids and timestamps are assigned before
+commit, so a newer reply can become visible before an older one; by then
+every transaction that could still add an older reply has finished.
+
+Usage (inside the backend container):
+    python -m app.workers.digest
+    python -m app.workers.digest --once
+"""
+import argparse
+import logging
+import os
+import signal
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session, aliased
+
+from app.database import SessionLocal
+from app.models import Booking, BookingStatus, CommunityPost, CommunityReply, DigestWatermark, User
+from app.utils.email import queue_emails, render_digest
+
+DIGEST_INTERVAL = float(os.getenv("DIGEST_INTERVAL", "3600"))
+DIGEST_REMINDER_HOURS = float(os.getenv("DIGEST_REMINDER_HOURS", "24"))
+DIGEST_EXCERPT_CHARS = int(os.getenv("DIGEST_EXCERPT_CHARS", "200"))
+# Longer than any transaction inserting replies is expected to stay open
+DIGEST_COMMIT_LAG = float(os.getenv("DIGEST_COMMIT_LAG", "300"))
+
+REPLIES_WATERMARK = "community_replies"
+
+logger = logging.getLogger("talesoul.digest")
+
+
+def new_recipient(email: str, name: str) -> dict:
+    return {"email": email, "name": name, "replies": [], "sessions": []}
+
+
+# ===== Queries =====
+def lock_watermark(db: Session, name: str, start=None) -> DigestWatermark:
+    """Fetch a watermark row FOR UPDATE, creating it at `start` (created_at, id) on first use
+
+    Starting at the newest existing row keeps the first run from sending
+    the whole history.
+    """
+    created_at, row_id = start if start is not None else (None, 0)
+    db.execute(
+        pg_insert(DigestWatermark).values(name=name, last_created_at=created_at, last_id=row_id)
+        .on_conflict_do_nothing()
+    )
+    return db.query(DigestWatermark).filter(DigestWatermark.name == name).with_for_update().one()
+
+
+def newest_settled_reply(db: Session):
+    """(created_at, id) of the newest reply at least DIGEST_COMMIT_LAG old, or None"""
+    return db.execute(
+        select(CommunityReply.created_at, CommunityReply.id)
+        .where(CommunityReply.created_at <= func.now() - timedelta(seconds=DIGEST_COMMIT_LAG))
+        .order_by(CommunityReply.created_at.desc(), CommunityReply.id.desc())
+        .limit(1)
+    ).first()
+
+
+def collect_replies(db: Session, watermark: DigestWatermark, newest, recipients: dict):
+    """Add replies in (watermark, newest] to their post authors' digests
+
+    Positions are (created_at, id); `newest` is the newest settled reply,
+    so replies younger than DIGEST_COMMIT_LAG are left for a later run.
+    """
+    if newest is None:
+        return
+
+    position = tuple_(CommunityReply.created_at, CommunityReply.id)
+
+    window = [position <= tuple_(
+        literal(newest.created_at, CommunityReply.created_at.type), literal(newest.id, CommunityReply.id.type)
+    )]
+    if watermark.last_created_at is not None:
+        if (newest.created_at, newest.id) <= (watermark.last_created_at, watermark.last_id):
+            return
+        window.append(position > tuple_(
+            literal(watermark.last_created_at, CommunityReply.created_at.type),
+            literal(watermark.last_id, CommunityReply.id.type)
+        ))
+
+    post_author = aliased(User)
+    reply_author = aliased(User)
+    rows = db.execute(
+        select(
+            post_author.id, post_author.email, post_author.full_name,
+            reply_author.full_name, CommunityPost.title, CommunityReply.content
+        )
+        .join(CommunityPost, CommunityReply.post_id == CommunityPost.id)
+        .join(post_author, CommunityPost.author_id == post_author.id)
+        .join(reply_author, CommunityReply.author_id == reply_author.id)
+        .where(
+            *window,
+            CommunityReply.author_id != CommunityPost.author_id,
+            post_author.is_active.is_(True)
+        )
+        .order_by(CommunityReply.created_at, CommunityReply.id)
+    ).all()
+
+    for user_id, email, name, author_name, post_title, content in rows:
+        if user_id not in recipients:
+            recipients[user_id] = new_recipient(email, name)
+        excerpt = content if len(content) <= DIGEST_EXCERPT_CHARS else content[:DIGEST_EXCERPT_CHARS] + "..."
+        recipients[user_id]["replies"].append(
+            {"author_name": author_name, "post_title": post_title, "excerpt": excerpt}
+        )
+
+    watermark.last_created_at, watermark.last_id = newest.created_at, newest.id
+
+
+def collect_sessions(db: Session, now: datetime, recipients: dict) -> list:
+    """Add upcoming unreminded sessions to both participants' digests; returns the booking ids"""
+    learner = aliased(User)
+    mentor = aliased(User)
+    rows = db.execute(
+        select(
+            Booking.id, Booking.scheduled_at, Booking.duration_minutes,
+            learner.id, learner.email, learner.full_name, learner.is_active,
+            mentor.id, mentor.email, mentor.full_name, mentor.is_active
+        )
+        .join(learner, Booking.user_id == learner.id)
+        .join(mentor, Booking.mentor_id == mentor.id)
+        .where(
+            Booking.status == BookingStatus.CONFIRMED,
+            Booking.scheduled_at > now,
+            Booking.scheduled_at <= now + timedelta(hours=DIGEST_REMINDER_HOURS),
+            Booking.reminder_sent_at.is_(None)
+        )
+        .order_by(Booking.scheduled_at)
+        .with_for_update(of=Booking, skip_locked=True)
+    ).all()
+
+    for (booking_id, scheduled_at, duration, learner_id, learner_email, learner_name, learner_active,
+         mentor_id, mentor_email, mentor_name, mentor_active) in rows:
+        scheduled_date = scheduled_at.strftime("%B %d, %Y at %I:%M %p")
+        for user_id, email, name, active, with_name in (
+            (learner_id, learner_email, learner_name, learner_active, mentor_name),
+            (mentor_id, mentor_email, mentor_name, mentor_active, learner_name),
+        ):
+            if not active:
+                continue
+            if user_id not in recipients:
+                recipients[user_id] = new_recipient(email, name)
+            recipients[user_id]["sessions"].append(
+                {"scheduled_date": scheduled_date, "duration_minutes": duration, "with_name": with_name}
+            )
+
+    return [row[0] for row in rows]
+
+
+# ===== Job =====
+def run_digest(db: Session) -> int:
+    """Queue one digest per recipient in a single transaction; returns the number queued"""
+    now = datetime.now(timezone.utc)
+    recipients = {}
+
+    newest = newest_settled_reply(db)
+    watermark = lock_watermark(db, REPLIES_WATERMARK, newest)
+    collect_replies(db, watermark, newest, recipients)
+    booking_ids = collect_sessions(db, now, recipients)
+
+    emails = []
+    for recipient in recipients.values():
+        html, text = render_digest(recipient["name"], recipient["replies"], recipient["sessions"])
+        emails.append({
+            "to_emails": [recipient["email"]],
+            "subject": "Your TaleSoul update",
+            "html_content": html,
+            "text_content": text,
+        })
+    queue_emails(db, emails)
+
+    if booking_ids:
+        db.execute(
+            update(Booking).where(Booking.id.in_(booking_ids)).values(reminder_sent_at=now),
+            execution_options={"synchronize_session": False}
+        )
+    db.commit()
+
+    logger.info("Queued %s digests (%s reminded bookings)", len(emails), len(booking_ids))
+    return len(emails)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="run one digest and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+
+    logger.info("Digest worker started (every %ss)", DIGEST_INTERVAL)
+    while not stopping.is_set():
+        db = SessionLocal()
+        try:
+            run_digest(db)
+        except Exception:
+            db.rollback()
+            logger.exception("Digest run failed")
+        finally:
+            db.close()
+
+        if args.once:
+            break
+        stopping.wait(DIGEST_INTERVAL)
+
+
+if __name__ == "__main__":
+    main()
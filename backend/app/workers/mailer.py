@@ -0,0 +1,175 @@
+"""Outbound email worker.
+
+Claims batches of queued `OutboundEmail` rows with FOR UPDATE SKIP LOCKED
+(so any number of workers can run side by side) and delivers them over a
+pool of persistent SMTP connections, several messages per connection.
+Failed messages are retried with exponential backoff.
+
+Usage (inside the backend container):
+    python -m app.workers.mailer
+    python -m app.workers.mailer --once
+"""
+import argparse
+import logging
+import os
+import random
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import JobStatus, OutboundEmail
+from app.utils.email import SMTP_POOL_SIZE, EmailService
+
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+EMAIL_POLL_INTERVAL = float(os.getenv("EMAIL_POLL_INTERVAL", "2"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+EMAIL_RETRY_BASE_SECONDS = float(os.getenv("EMAIL_RETRY_BASE_SECONDS", "30"))
+EMAIL_RETRY_MAX_SECONDS = float(os.getenv("EMAIL_RETRY_MAX_SECONDS", "3600"))
+# Sending rows older than this are assumed orphaned by a dead worker and reclaimed
+EMAIL_SEND_TIMEOUT = int(os.getenv("EMAIL_SEND_TIMEOUT", "600"))
+
+logger = logging.getLogger("talesoul.mailer")
+
+
+# ===== Queue =====
+def claim_batch(db: Session, limit: int = EMAIL_BATCH_SIZE) -> List[OutboundEmail]:
+    """Lock up to `limit` due messages and mark them running"""
+    now = datetime.now(timezone.utc)
+    batch = db.query(OutboundEmail).filter(
+        or_(
+            and_(OutboundEmail.status == JobStatus.QUEUED, OutboundEmail.next_attempt_at <= now),
+            and_(
+                OutboundEmail.status == JobStatus.RUNNING,
+                OutboundEmail.started_at < now - timedelta(seconds=EMAIL_SEND_TIMEOUT)
+            )
+        )
+    ).order_by(OutboundEmail.next_attempt_at, OutboundEmail.id).limit(limit).with_for_update(skip_locked=True).all()
+
+    for email in batch:
+        email.status = JobStatus.RUNNING
+        email.started_at = now
+        email.attempts += 1
+    db.commit()
+    return batch
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with 10% jitter, so retries from one outage spread out"""
+    delay = min(EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1), EMAIL_RETRY_MAX_SECONDS)
+    return delay * random.uniform(1.0, 1.1)
+
+
+def queue_status(db: Session) -> dict:
+    """Queue depth by status and deliveries over the last minute (all workers)"""
+    now = datetime.now(timezone.utc)
+    counts = dict(
+        db.query(OutboundEmail.status, func.count(OutboundEmail.id))
+        .filter(OutboundEmail.status != JobStatus.DONE)
+        .group_by(OutboundEmail.status)
+        .all()
+    )
+    oldest_queued = db.query(func.min(OutboundEmail.created_at)).filter(
+        OutboundEmail.status == JobStatus.QUEUED
+    ).scalar()
+    sent_last_minute = db.query(func.count(OutboundEmail.id)).filter(
+        OutboundEmail.sent_at >= now - timedelta(minutes=1)
+    ).scalar()
+
+    return {
+        "queued": counts.get(JobStatus.QUEUED, 0),
+        "sending": counts.get(JobStatus.RUNNING, 0),
+        "failed": counts.get(JobStatus.FAILED, 0),
+        "oldest_queued_seconds": (now - oldest_queued).total_seconds() if oldest_queued else 0,
+        "sent_last_minute": sent_last_minute,
+    }
+
+
+# ===== Delivery =====
+def deliver(service: EmailService, executor: ThreadPoolExecutor, batch: List[OutboundEmail]) -> list:
+    """Send a batch split across pooled connections; returns an error (or None) per message"""
+    messages = [
+        service.build_message(email.to_emails, email.subject, email.html_content, email.text_content)
+        for email in batch
+    ]
+    # One slice per connection, each sent back to back on that connection
+    slices = [messages[i::SMTP_POOL_SIZE] for i in range(SMTP_POOL_SIZE)]
+    results = list(executor.map(service.send_messages, slices))
+
+    errors = [None] * len(messages)
+    for offset, slice_errors in enumerate(results):
+        errors[offset::SMTP_POOL_SIZE] = slice_errors
+    return errors
+
+
+def run_batch(db: Session, service: EmailService, executor: ThreadPoolExecutor, batch: List[OutboundEmail]) -> int:
+    started = time.monotonic()
+    errors = deliver(service, executor, batch)
+    now = datetime.now(timezone.utc)
+
+    sent = 0
+    for email, error in zip(batch, errors):
+        if error is None:
+            email.status = JobStatus.DONE
+            email.error = None
+            email.sent_at = now
+            sent += 1
+        elif email.attempts >= EMAIL_MAX_ATTEMPTS:
+            email.status = JobStatus.FAILED
+            email.error = str(error)[-4000:]
+        else:
+            email.status = JobStatus.QUEUED
+            email.error = str(error)[-4000:]
+            email.next_attempt_at = now + timedelta(seconds=retry_delay(email.attempts))
+    db.commit()
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        "Sent %s/%s emails in %.2fs (%.1f/s)", sent, len(batch), elapsed, sent / elapsed if elapsed else 0
+    )
+    return sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    # Finish the current batch on SIGTERM/SIGINT, then exit
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+
+    service = EmailService()
+    executor = ThreadPoolExecutor(max_workers=SMTP_POOL_SIZE, thread_name_prefix="smtp")
+
+    logger.info("Mailer started")
+    try:
+        while not stopping.is_set():
+            db = SessionLocal()
+            try:
+                batch = claim_batch(db)
+                if batch:
+                    run_batch(db, service, executor, batch)
+                    continue
+            finally:
+                db.close()
+
+            if args.once:
+                break
+            stopping.wait(EMAIL_POLL_INTERVAL)
+    finally:
+        executor.shutdown()
+        service.pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""HLS transcode worker.
+
+Claims queued `TranscodeJob` rows with FOR UPDATE SKIP LOCKED (so any number
+of workers can run side by side), segments the source video into an
+adaptive-bitrate HLS ladder with ffmpeg, and switches `Course.video_url` to
+the master playlist once it is complete. Until then the course keeps
+playing the original upload.
+
+Usage (inside the backend container):
+    python -m app.workers.transcode
+    python -m app.workers.transcode --once
+"""
+import argparse
+import glob
+import json
+import logging
+import math
+import os
+import shutil
+import signal
+import subprocess
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Course, JobStatus, TranscodeJob, VideoStatus
+from app.utils.streaming import STREAM_TOKEN_EXPIRE_MINUTES
+from app.utils.uploads import UPLOAD_DIR, open_upload
+
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+FFPROBE_BIN = os.getenv("FFPROBE_BIN", "ffprobe")
+TRANSCODE_PRESET = os.getenv("TRANSCODE_PRESET", "veryfast")
+TRANSCODE_POLL_INTERVAL = float(os.getenv("TRANSCODE_POLL_INTERVAL", "5"))
+TRANSCODE_MAX_ATTEMPTS = int(os.getenv("TRANSCODE_MAX_ATTEMPTS", "3"))
+# Running jobs older than this are assumed orphaned by a dead worker and reclaimed
+TRANSCODE_JOB_TIMEOUT = int(os.getenv("TRANSCODE_JOB_TIMEOUT", "7200"))
+HLS_SEGMENT_SECONDS = int(os.getenv("HLS_SEGMENT_SECONDS", "6"))
+
+# A superseded ladder is kept as long as a stream token issued just before
+# the switch stays valid, so players mid-playback don't hit 404s
+RENDITION_RETENTION = STREAM_TOKEN_EXPIRE_MINUTES * 60
+RENDITION_SWEEP_INTERVAL = float(os.getenv("RENDITION_SWEEP_INTERVAL", "600"))
+RETIRED_MARKER = ".retired"  # Its mtime is when the ladder was superseded
+
+# Bitrate ladder: (name, height, video kbps, audio kbps)
+RENDITIONS = [
+    ("1080p", 1080, 5000, 192),
+    ("720p", 720, 2800, 128),
+    ("480p", 480, 1400, 128),
+    ("360p", 360, 800, 96),
+]
+
+logger = logging.getLogger("talesoul.transcode")
+
+
+# ===== Queue =====
+def enqueue_transcode(db: Session, course: Course, source_url: str):
+    """Queue an HLS transcode of a freshly uploaded video (caller commits)"""
+    course.source_video_url = source_url
+    course.video_url = source_url  # Playable right away; replaced by the manifest when ready
+    course.video_status = VideoStatus.PROCESSING
+    course.video_renditions = None
+    db.add(TranscodeJob(course_id=course.id, source_url=source_url))
+
+
+def claim_job(db: Session) -> Optional[TranscodeJob]:
+    """Lock the oldest runnable job and mark it running"""
+    now = datetime.now(timezone.utc)
+    job = db.query(TranscodeJob).filter(
+        or_(
+            TranscodeJob.status == JobStatus.QUEUED,
+            and_(
+                TranscodeJob.status == JobStatus.RUNNING,
+                TranscodeJob.started_at < now - timedelta(seconds=TRANSCODE_JOB_TIMEOUT)
+            )
+        )
+    ).order_by(TranscodeJob.id).with_for_update(skip_locked=True).first()
+
+    if job is None:
+        db.rollback()
+        return None
+
+    job.status = JobStatus.RUNNING
+    job.started_at = now
+    job.attempts += 1
+    db.commit()
+    return job
+
+
+def is_latest_job(db: Session, job: TranscodeJob) -> bool:
+    """False when the course has been re-uploaded since this job was queued"""
+    newer = db.query(TranscodeJob.id).filter(
+        TranscodeJob.course_id == job.course_id,
+        TranscodeJob.id > job.id
+    ).first()
+    return newer is None
+
+
+def is_cancelled(db: Session, job: TranscodeJob) -> bool:
+    """True when the job's course (and with it the job row) was deleted while it ran
+
+    Otherwise the job row stays locked until the caller commits, so a course
+    delete (which cascades to it) waits for the job's result to be saved.
+    """
+    return db.query(TranscodeJob.id).filter(TranscodeJob.id == job.id).with_for_update().first() is None
+
+
+# ===== ffmpeg =====
+def probe(source_path: str) -> dict:
+    """Height, duration and audio presence of the source video"""
+    result = subprocess.run(
+        [FFPROBE_BIN, "-v", "error", "-show_entries", "stream=codec_type,height:format=duration",
+         "-of", "json", source_path],
+        check=True, capture_output=True, text=True
+    )
+    info = json.loads(result.stdout)
+    streams = info.get("streams", [])
+    heights = [s["height"] for s in streams if s.get("codec_type") == "video" and s.get("height")]
+    return {
+        "height": max(heights) if heights else 0,
+        "duration": float(info.get("format", {}).get("duration") or 0),
+        "has_audio": any(s.get("codec_type") == "audio" for s in streams),
+    }
+
+
+def select_renditions(source_height: int) -> List[tuple]:
+    """Ladder rungs at or below the source height; never upscale"""
+    ladder = [r for r in RENDITIONS if r[1] <= source_height]
+    if not ladder:
+        name, _, video_kbps, audio_kbps = RENDITIONS[-1]
+        height = max(source_height - source_height % 2, 2)
+        ladder = [(f"{height}p", height, video_kbps, audio_kbps)]
+    return ladder
+
+
+def build_ffmpeg_command(source_path: str, output_dir: str, renditions: List[tuple], has_audio: bool) -> List[str]:
+    """One ffmpeg pass: decode once, scale to every rung, write HLS + master playlist"""
+    count = len(renditions)
+    filters = [f"[0:v]split={count}" + "".join(f"[v{i}]" for i in range(count))]
+    filters += [f"[v{i}]scale=-2:{height}[v{i}out]" for i, (_, height, _, _) in enumerate(renditions)]
+
+    command = [
+        FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-y",
+        "-i", source_path,
+        "-filter_complex", ";".join(filters),
+    ]
+
+    stream_map = []
+    for i, (name, _, video_kbps, audio_kbps) in enumerate(renditions):
+        command += [
+            "-map", f"[v{i}out]",
+            f"-c:v:{i}", "libx264",
+            f"-b:v:{i}", f"{video_kbps}k",
+            f"-maxrate:v:{i}", f"{video_kbps * 107 // 100}k",
+            f"-bufsize:v:{i}", f"{video_kbps * 2}k",
+        ]
+        entry = f"v:{i}"
+        if has_audio:
+            command += ["-map", "0:a:0", f"-c:a:{i}", "aac", f"-b:a:{i}", f"{audio_kbps}k"]
+            entry += f",a:{i}"
+        stream_map.append(f"{entry},name:{name}")
+
+    command += [
+        "-preset", TRANSCODE_PRESET,
+        # Keyframe at every segment boundary so renditions switch cleanly
+        "-force_key_frames", f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})",
+        "-sc_threshold", "0",
+        "-ac", "2",
+        "-f", "hls",
+        "-hls_time", str(HLS_SEGMENT_SECONDS),
+        "-hls_playlist_type", "vod",
+        "-hls_flags", "independent_segments",
+        "-hls_segment_filename", os.path.join(output_dir, "%v", "segment_%04d.ts"),
+        "-master_pl_name", "master.m3u8",
+        "-var_stream_map", " ".join(stream_map),
+        os.path.join(output_dir, "%v", "index.m3u8"),
+    ]
+    return command
+
+
+# ===== Jobs =====
+def transcode(job: TranscodeJob) -> dict:
+    """Produce the HLS ladder for a job; returns the course fields to update"""
+    relative_dir = f"hls/course_{job.course_id}/{job.id}"
+    output_dir = os.path.join(UPLOAD_DIR, relative_dir)
+    temp_dir = f"{output_dir}.tmp"
+
+    # Downloaded to a temp file first when the source lives in object storage
+    with open_upload(job.source_url) as source_path:
+        info = probe(source_path)
+        renditions = select_renditions(info["height"])
+
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        for name, _, _, _ in renditions:
+            os.makedirs(os.path.join(temp_dir, name))
+
+        subprocess.run(
+            build_ffmpeg_command(source_path, temp_dir, renditions, info["has_audio"]),
+            check=True, capture_output=True, text=True, timeout=TRANSCODE_JOB_TIMEOUT
+        )
+
+    # Publish the finished ladder in one rename so players never see a partial one
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(temp_dir, output_dir)
+
+    return {
+        "output_dir": output_dir,
+        "video_url": f"/uploads/{relative_dir}/master.m3u8",
+        "duration": info["duration"],
+        "renditions": [
+            {
+                "name": name,
+                "height": height,
+                "bandwidth": (video_kbps + (audio_kbps if info["has_audio"] else 0)) * 1000,
+                "playlist": f"/uploads/{relative_dir}/{name}/index.m3u8",
+            }
+            for name, height, video_kbps, audio_kbps in renditions
+        ],
+    }
+
+
+def retire_old_renditions(course_id: int, keep_job_id: int):
+    """Mark the course's other ladders as superseded now; sweep_retired_renditions deletes them later"""
+    course_dir = os.path.join(UPLOAD_DIR, "hls", f"course_{course_id}")
+    for entry in os.listdir(course_dir):
+        marker = os.path.join(course_dir, entry, RETIRED_MARKER)
+        if entry != str(keep_job_id) and not os.path.exists(marker):
+            open(marker, "w").close()
+
+
+def sweep_retired_renditions() -> int:
+    """Delete ladders superseded more than RENDITION_RETENTION ago; returns how many"""
+    cutoff = time.time() - RENDITION_RETENTION
+    removed = 0
+    for marker in glob.glob(os.path.join(UPLOAD_DIR, "hls", "course_*", "*", RETIRED_MARKER)):
+        try:
+            retired_at = os.path.getmtime(marker)
+        except FileNotFoundError:
+            continue  # Swept by another worker
+        if retired_at < cutoff:
+            shutil.rmtree(os.path.dirname(marker), ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def drop_cancelled_job(db: Session, job: TranscodeJob):
+    """Discard a job whose course was deleted while it ran, with any output"""
+    db.rollback()
+    shutil.rmtree(os.path.join(UPLOAD_DIR, "hls", f"course_{job.course_id}"), ignore_errors=True)
+    logger.info("Transcode job %s dropped: course %s was deleted", job.id, job.course_id)
+
+
+def run_job(db: Session, job: TranscodeJob):
+    logger.info("Transcoding course %s (job %s, attempt %s)", job.course_id, job.id, job.attempts)
+    try:
+        result = transcode(job)
+    except Exception as exc:
+        if is_cancelled(db, job):
+            drop_cancelled_job(db, job)
+            return
+        job.error = (getattr(exc, "stderr", None) or str(exc))[-4000:]
+        if job.attempts >= TRANSCODE_MAX_ATTEMPTS:
+            job.status = JobStatus.FAILED
+            job.finished_at = datetime.now(timezone.utc)
+            if is_latest_job(db, job):
+                # The original upload keeps playing
+                db.query(Course).filter(Course.id == job.course_id).update({"video_status": VideoStatus.FAILED})
+        else:
+            job.status = JobStatus.QUEUED
+        db.commit()
+        logger.exception("Transcode job %s failed", job.id)
+        return
+
+    if is_cancelled(db, job):
+        drop_cancelled_job(db, job)
+        return
+
+    job.status = JobStatus.DONE
+    job.error = None
+    job.finished_at = datetime.now(timezone.utc)
+
+    if is_latest_job(db, job):
+        # Locked so the course can't be deleted before the commit
+        course = db.query(Course).filter(Course.id == job.course_id).with_for_update().first()
+        if course is None:
+            drop_cancelled_job(db, job)
+            return
+        course.video_url = result["video_url"]
+        course.video_renditions = result["renditions"]
+        course.video_status = VideoStatus.READY
+        if course.duration_minutes is None and result["duration"]:
+            course.duration_minutes = math.ceil(result["duration"] / 60)
+        db.commit()
+        retire_old_renditions(job.course_id, job.id)
+    else:
+        # Superseded by a newer upload while running
+        db.commit()
+        shutil.rmtree(result["output_dir"], ignore_errors=True)
+
+    logger.info("Transcode job %s done: %s", job.id, result["video_url"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    # Finish the current job on SIGTERM/SIGINT, then exit
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+
+    logger.info("Transcode worker started")
+    last_sweep = float("-inf")
+    while not stopping.is_set():
+        db = SessionLocal()
+        try:
+            job = claim_job(db)
+            if job is not None:
+                run_job(db, job)
+                continue
+        finally:
+            db.close()
+
+        # Queue is empty; clean up superseded ladders now and then
+        if time.monotonic() - last_sweep >= RENDITION_SWEEP_INTERVAL:
+            last_sweep = time.monotonic()
+            removed = sweep_retired_renditions()
+            if removed:
+                logger.info("Removed %s superseded HLS ladders", removed)
+
+        if args.once:
+            break
+        stopping.wait(TRANSCODE_POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    main()
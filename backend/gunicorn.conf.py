@@ -0,0 +1,38 @@
+"""Production server settings: `gunicorn -c gunicorn.conf.py app.main:app`
+
+Runs WEB_CONCURRENCY uvicorn workers (default: one per CPU). The app is
+imported once in the master and forked (preload), and each worker is
+replaced after about GUNICORN_MAX_REQUESTS requests to bound memory growth.
+SIGTERM drains the workers: they stop accepting, finish in-flight requests
+within GUNICORN_GRACEFUL_TIMEOUT seconds and close their pools.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "app.server.Worker"
+
+# app.database splits DB_MAX_CONNECTIONS across this many workers; set it
+# before preload imports the app
+os.environ["WEB_CONCURRENCY"] = str(workers)
+preload_app = True
+
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+# Stagger restarts so the workers don't all recycle at once
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", str(max_requests // 10)))
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG") or None
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    """Drop pool connections inherited from the master; each worker opens its own"""
+    from app.database import async_engine, engine
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
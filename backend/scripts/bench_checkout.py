@@ -0,0 +1,189 @@
+"""End-to-end checkout benchmark that runs fully offline.
+
+Start the API with the fake payment gateway, optionally with injected
+provider latency and failures:
+
+    PAYMENT_GATEWAY=fake FAKE_PAYMENT_LATENCY_MS=150 FAKE_PAYMENT_FAILURE_RATE=0.02 \\
+        docker-compose up -d backend-api
+
+Each checkout then runs the steps a browser and the provider would:
+book a session, create the payment intent (with an Idempotency-Key),
+deliver the provider's signed `payment_intent.succeeded` webhook, and
+confirm the payment. Prints per-step latency and the overall checkout rate.
+Nothing leaves the machine.
+
+Usage:
+    python scripts/bench_checkout.py --base-url http://localhost:8000 \\
+        --email admin@talesoul.com --password admin123 \\
+        --concurrency 10 --requests 100
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import secrets
+import statistics
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+STEPS = ["book", "intent", "webhook", "confirm"]
+
+
+def http_request(method, url, data=None, headers=None):
+    """Send a request and return (status code, decoded JSON body or None)"""
+    request = urllib.request.Request(url, data=data, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            body = response.read()
+            return response.status, json.loads(body) if body else None
+    except urllib.error.HTTPError as e:
+        return e.code, None
+
+
+def post_json(url, payload, headers=None):
+    return http_request(
+        "POST", url, json.dumps(payload).encode(), {"Content-Type": "application/json", **(headers or {})}
+    )
+
+
+def sign(payload: bytes, secret: str, timestamp: int) -> str:
+    """Stripe-Signature header value, as the fake gateway expects it"""
+    signature = hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def login(args) -> str:
+    body = urllib.parse.urlencode({"username": args.email, "password": args.password}).encode()
+    status_code, data = http_request(
+        "POST", f"{args.base_url}/api/v1/auth/login", body,
+        {"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    if status_code != 200:
+        raise SystemExit(f"Login failed ({status_code})")
+    return data["access_token"]
+
+
+def first_mentor(args) -> int:
+    status_code, mentors = http_request("GET", f"{args.base_url}/api/v1/bookings/mentors")
+    if status_code != 200 or not mentors:
+        raise SystemExit("No approved mentor to book; pass --mentor-id")
+    return mentors[0]["user_id"]
+
+
+def checkout(args, token, user_id, mentor_id, i):
+    """Run one checkout; returns ({step: seconds}, failed step or None)"""
+    api = f"{args.base_url}/api/v1"
+    auth = {"Authorization": f"Bearer {token}"}
+    timings = {}
+
+    def step(name, call):
+        start = time.perf_counter()
+        result = call()
+        timings[name] = time.perf_counter() - start
+        return result
+
+    scheduled_at = datetime.now(timezone.utc) + timedelta(days=30, minutes=i)
+    status_code, booking = step("book", lambda: post_json(
+        f"{api}/bookings/book",
+        {"mentor_id": mentor_id, "scheduled_at": scheduled_at.isoformat(), "duration_minutes": 60},
+        auth
+    ))
+    if status_code != 201:
+        return timings, "book"
+
+    status_code, intent = step("intent", lambda: post_json(
+        f"{api}/payments/create-payment-intent",
+        {"booking_id": booking["id"]},
+        {**auth, "Idempotency-Key": secrets.token_hex(16)}
+    ))
+    if status_code != 200:
+        return timings, "intent"
+
+    event = {
+        "id": f"evt_bench_{secrets.token_hex(8)}",
+        "object": "event",
+        "type": "payment_intent.succeeded",
+        "data": {"object": {
+            "id": intent["payment_intent_id"],
+            "object": "payment_intent",
+            "status": "succeeded",
+            "metadata": {"user_id": str(user_id), "booking_id": str(booking["id"]), "course_id": ""},
+        }},
+    }
+    payload = json.dumps(event).encode()
+    status_code, _ = step("webhook", lambda: http_request(
+        "POST", f"{api}/payments/webhook", payload,
+        {"Content-Type": "application/json", "Stripe-Signature": sign(payload, args.secret, int(time.time()))}
+    ))
+    if status_code != 200:
+        return timings, "webhook"
+
+    status_code, _ = step("confirm", lambda: post_json(
+        f"{api}/payments/confirm-payment",
+        {"payment_intent_id": intent["payment_intent_id"], "booking_id": booking["id"]},
+        auth
+    ))
+    if status_code != 200:
+        return timings, "confirm"
+    return timings, None
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "requests": len(values),
+        "p50_ms": round(statistics.median(values) * 1000, 1),
+        "p95_ms": round(values[max(int(len(values) * 0.95) - 1, 0)] * 1000, 1),
+        "max_ms": round(values[-1] * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="admin@talesoul.com")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--mentor-id", type=int, help="user id of an approved mentor (default: the first listed)")
+    parser.add_argument("--secret", default="whsec_fake", help="FAKE_PAYMENT_WEBHOOK_SECRET of the API")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    token = login(args)
+    _, me = http_request("GET", f"{args.base_url}/api/v1/auth/me", headers={"Authorization": f"Bearer {token}"})
+    mentor_id = args.mentor_id or first_mentor(args)
+
+    latencies = {name: [] for name in STEPS}
+    checkouts = []
+    failures = {name: 0 for name in STEPS}
+
+    def one(i):
+        start = time.perf_counter()
+        timings, failed = checkout(args, token, me["id"], mentor_id, i)
+        return timings, failed, time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for timings, failed, elapsed in pool.map(one, range(args.requests)):
+            for name, seconds in timings.items():
+                latencies[name].append(seconds)
+            if failed:
+                failures[failed] += 1
+            else:
+                checkouts.append(elapsed)
+    wall = time.perf_counter() - started
+
+    report = {name: summarize(values) for name, values in latencies.items() if values}
+    if checkouts:
+        report["checkout"] = summarize(checkouts)
+    report["_failures"] = failures
+    report["_checkouts_per_s"] = round(len(checkouts) / wall, 1) if wall else 0.0
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
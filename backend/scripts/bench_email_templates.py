@@ -0,0 +1,63 @@
+"""Measure email template renders per second.
+
+Renders the booking confirmation (HTML and text) for fake recipients one at
+a time, then as a batch with the mentor, date and price shared. Batch
+rendering fills and escapes those fields once per batch, not per recipient.
+
+Usage (inside the backend container):
+    python scripts/bench_email_templates.py
+    python scripts/bench_email_templates.py --recipients 50000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def report(label, count, elapsed):
+    print(f"{label:<32} {count / elapsed:>12,.0f} renders/s  ({elapsed * 1000:.1f} ms for {count})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=3, help="best of this many runs")
+    args = parser.parse_args()
+
+    from app.utils.email import BOOKING_CONFIRMATION_HTML, booking_context, get_booking_confirmation_template
+
+    mentor = SimpleNamespace(full_name="Ada <Mentor> Lovelace")
+    booking = SimpleNamespace(
+        scheduled_at=datetime(2026, 11, 3, 15, 30), duration_minutes=60, price=49.0, meeting_link="https://meet.example/x"
+    )
+    users = [SimpleNamespace(full_name=f"User {i}", email=f"user{i}@example.com") for i in range(args.recipients)]
+
+    def single():
+        for user in users:
+            get_booking_confirmation_template(booking, user, mentor)
+
+    shared = booking_context(booking, users[0], mentor)
+    del shared["user_name"]
+    contexts = [{"user_name": user.full_name} for user in users]
+
+    def batch():
+        BOOKING_CONFIRMATION_HTML.render_many(contexts, shared=shared)
+
+    for label, run, renders in (
+        ("single (html + text)", single, 2 * len(users)),
+        ("batch html, shared fields", batch, len(users)),
+    ):
+        best = float("inf")
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        report(label, renders, best)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Compare offset and cursor pagination latency at increasing page depth.
+
+Walks `GET /api/v1/community/posts` page by page with `cursor`, and at the
+sampled depths also fetches the same page with `skip`. Offset latency grows
+with depth because Postgres scans and discards every skipped row. Cursor
+latency should stay flat.
+
+Usage (inside the backend container, so --seed can reach the database):
+    python scripts/bench_pagination.py --seed 100000
+    python scripts/bench_pagination.py --base-url http://localhost:8000 --pages 1000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed_posts(count):
+    """Insert `count` posts (plus a group and author) directly through SQLAlchemy"""
+    from app.database import SessionLocal
+    from app.models import CommunityGroup, CommunityPost, User
+
+    db = SessionLocal()
+    try:
+        author = User(email=f"bench-{time.time()}@talesoul.com", full_name="Bench", hashed_password="-")
+        group = CommunityGroup(name="Pagination benchmark")
+        db.add_all([author, group])
+        db.flush()
+
+        batch = 5000
+        for start in range(0, count, batch):
+            db.bulk_insert_mappings(CommunityPost, [
+                {"group_id": group.id, "author_id": author.id, "title": f"Post {i}", "content": "benchmark"}
+                for i in range(start, min(start + batch, count))
+            ])
+            db.commit()
+        print(f"Seeded {count} posts in group {group.id}")
+    finally:
+        db.close()
+
+
+def timed_get(url):
+    start = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=120) as response:
+        body = json.loads(response.read())
+    return time.perf_counter() - start, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/v1/community/posts")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="insert this many posts and exit")
+    args = parser.parse_args()
+
+    if args.seed:
+        seed_posts(args.seed)
+        return
+
+    samples = sorted({1, 10, 100, 1000, args.pages} & set(range(1, args.pages + 1)))
+    report = []
+    cursor = ""
+    for page in range(1, args.pages + 1):
+        query = urllib.parse.urlencode({"cursor": cursor, "limit": args.limit})
+        cursor_seconds, body = timed_get(f"{args.base_url}{args.path}?{query}")
+
+        if page in samples:
+            query = urllib.parse.urlencode({"skip": (page - 1) * args.limit, "limit": args.limit})
+            offset_seconds, _ = timed_get(f"{args.base_url}{args.path}?{query}")
+            report.append({
+                "page": page,
+                "cursor_ms": round(cursor_seconds * 1000, 1),
+                "offset_ms": round(offset_seconds * 1000, 1),
+            })
+
+        cursor = body["next_cursor"]
+        if cursor is None:
+            print(f"Ran out of rows at page {page}; seed more with --seed")
+            break
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
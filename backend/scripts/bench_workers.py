@@ -0,0 +1,82 @@
+"""Throughput of the production server at 1, 2, 4 and 8 workers.
+
+For each worker count, starts `gunicorn -c gunicorn.conf.py app.main:app` on
+a local port, waits until it is ready, runs the same read-only mix as
+scripts/loadtest.py (`async-reads` scenario) and stops it with SIGTERM,
+timing the graceful drain. Run from backend/ with the app's environment
+(DATABASE_URL, ...) set; the database is shared by every run, so give it
+enough DB_MAX_CONNECTIONS for the largest count.
+
+Usage:
+    python scripts/bench_workers.py --workers 1 2 4 8 --concurrency 64 --requests 4000
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from loadtest import ENDPOINTS, SCENARIOS, run_phase, summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_ready(base_url, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base_url}/api/v1/health/ready", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Server at {base_url} did not become ready in {timeout}s")
+
+
+def bench(workers, args):
+    base_url = f"http://127.0.0.1:{args.port}"
+    env = {**os.environ, "WEB_CONCURRENCY": str(workers), "GUNICORN_BIND": f"127.0.0.1:{args.port}"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_ready(base_url, args.startup_timeout)
+        args.base_url = base_url
+        calls = [(label, ENDPOINTS[label](args)) for label in SCENARIOS[args.scenario]]
+        run_phase(calls, args.concurrency * 2, args.concurrency)  # warm up pools and caches
+        result = summarize(*run_phase(calls, args.requests, args.concurrency))
+    finally:
+        stopping = time.perf_counter()
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+    result["_drain_s"] = round(time.perf_counter() - stopping, 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="async-reads")
+    parser.add_argument("--email", default="admin@talesoul.com")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    report = {}
+    for workers in args.workers:
+        report[f"{workers}_workers"] = bench(workers, args)
+        print(f"{workers} workers: {report[f'{workers}_workers']['_rps']} req/s", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
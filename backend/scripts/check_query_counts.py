@@ -0,0 +1,182 @@
+"""Count the SQL statements each list endpoint runs and fail if any grows with page size.
+
+Calls the app in-process (no server) at two page sizes, counting statements
+on both the sync and async engines. An endpoint fails when the larger page
+runs more statements than the smaller one (an N+1, such as a nested user
+lazy-loaded per row), or more than its budget. Endpoints that return no
+more rows at the larger size can't show growth and are reported as skipped;
+`--seed` inserts enough rows for every endpoint.
+
+Usage (inside the backend container, against a migrated database):
+    python scripts/check_query_counts.py --seed
+    python scripts/check_query_counts.py
+"""
+import argparse
+import os
+import secrets
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SMALL_PAGE = 2
+LARGE_PAGE = 20
+
+# (label, path, params, statement budget); pages are requested with `limit`
+ENDPOINTS = [
+    ("bookings.list_approved_mentors", "/api/v1/bookings/mentors", {}, 2),
+    ("admin.list_pending_mentors", "/api/v1/admin/pending-mentors", {}, 2),
+    ("admin.list_all_mentors", "/api/v1/admin/mentors", {}, 2),
+    ("admin.list_all_users", "/api/v1/admin/users", {}, 1),
+    ("admin.list_all_users(cursor)", "/api/v1/admin/users", {"cursor": ""}, 1),
+    ("admin.list_all_bookings", "/api/v1/admin/bookings", {}, 1),
+    ("admin.list_all_bookings(cursor)", "/api/v1/admin/bookings", {"cursor": ""}, 1),
+    ("admin.list_all_courses", "/api/v1/admin/courses", {}, 2),
+    ("courses.list_courses", "/api/v1/courses/", {}, 2),
+    ("courses.list_courses(cursor)", "/api/v1/courses/", {"cursor": ""}, 2),
+    ("community.list_groups", "/api/v1/community/groups", {}, 1),
+    ("community.list_posts", "/api/v1/community/posts", {}, 2),
+    ("community.list_posts(cursor)", "/api/v1/community/posts", {"cursor": ""}, 2),
+    ("community.list_post_replies", "/api/v1/community/posts/{post_id}/replies", {}, 3),
+    ("community.list_post_replies(cursor)", "/api/v1/community/posts/{post_id}/replies", {"cursor": ""}, 3),
+]
+
+
+def seed(count):
+    """Insert `count` rows behind every endpoint, plus an admin to call them as"""
+    from app.database import SessionLocal
+    from app.models import (
+        Booking, CommunityGroup, CommunityPost, CommunityReply, Course, MentorProfile, MentorStatus, User, UserRole
+    )
+
+    tag = secrets.token_hex(4)
+    db = SessionLocal()
+    try:
+        admin = User(email=f"qc-{tag}-admin@talesoul.com", full_name="Query Check Admin",
+                     hashed_password="-", role=UserRole.ADMIN)
+        mentors = [
+            User(email=f"qc-{tag}-mentor-{i}@talesoul.com", full_name=f"Mentor {i}",
+                 hashed_password="-", role=UserRole.MENTOR)
+            for i in range(2 * count)
+        ]
+        group = CommunityGroup(name=f"Query check {tag}")
+        db.add_all([admin, group, *mentors])
+        db.flush()
+
+        db.add_all([
+            MentorProfile(user_id=mentor.id, status=MentorStatus.APPROVED if i % 2 else MentorStatus.PENDING)
+            for i, mentor in enumerate(mentors)
+        ])
+        db.add_all([
+            Course(instructor_id=mentors[i].id, title=f"Course {i}", price=0, is_published=True)
+            for i in range(count)
+        ])
+        start = datetime.now(timezone.utc) + timedelta(days=1)
+        db.add_all([
+            Booking(user_id=admin.id, mentor_id=mentors[i].id, scheduled_at=start + timedelta(hours=i), price=0)
+            for i in range(count)
+        ])
+        posts = [
+            CommunityPost(group_id=group.id, author_id=mentors[i].id, title=f"Post {i}", content="query check")
+            for i in range(count)
+        ]
+        db.add_all(posts)
+        db.flush()
+        db.add_all([
+            CommunityReply(post_id=posts[0].id, author_id=mentors[i].id, content=f"Reply {i}")
+            for i in range(count)
+        ])
+        db.commit()
+        print(f"Seeded {count} rows per endpoint (tag {tag})")
+    finally:
+        db.close()
+
+
+def find_fixtures():
+    """An admin to authenticate as and the post with the most replies"""
+    from sqlalchemy import func
+
+    from app.database import SessionLocal
+    from app.models import CommunityReply, User, UserRole
+
+    db = SessionLocal()
+    try:
+        admin = db.query(User).filter(User.role == UserRole.ADMIN, User.is_active == True).first()
+        post = db.query(CommunityReply.post_id).group_by(CommunityReply.post_id).order_by(
+            func.count().desc()
+        ).first()
+        return admin, post[0] if post else 0
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", nargs="?", type=int, const=LARGE_PAGE, default=0,
+                        help=f"first insert this many rows per endpoint (default {LARGE_PAGE})")
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from app.database import async_engine, engine
+    from app.main import app
+    from app.routers.auth import create_access_token
+
+    if args.seed:
+        seed(args.seed)
+
+    admin, post_id = find_fixtures()
+    if admin is None:
+        print("No active admin user to call the endpoints as; run with --seed")
+        sys.exit(1)
+    token = create_access_token({"sub": admin.email, "user_id": admin.id, "role": admin.role.value})
+
+    statements = 0
+
+    def count_statement(*_):
+        nonlocal statements
+        statements += 1
+
+    for counted in (engine, async_engine.sync_engine):
+        event.listen(counted, "before_cursor_execute", count_statement)
+
+    # Not a context manager: startup hooks (background sweeps) stay off
+    client = TestClient(app, headers={"Authorization": f"Bearer {token}"})
+
+    def measure(path, params, limit):
+        nonlocal statements
+        statements = 0
+        response = client.get(path, params={**params, "limit": limit})
+        response.raise_for_status()
+        body = response.json()
+        rows = len(body["items"] if isinstance(body, dict) else body)
+        return statements, rows
+
+    client.get("/api/v1/auth/me")  # Warm the user cache so auth adds no statements
+    failures = skipped = 0
+    for label, path, params, budget in ENDPOINTS:
+        path = path.format(post_id=post_id)
+        small, small_rows = measure(path, params, SMALL_PAGE)
+        large, large_rows = measure(path, params, LARGE_PAGE)
+
+        if large > small or large > budget:
+            verdict = "FAIL"
+            failures += 1
+        elif large_rows <= small_rows:
+            verdict = "skipped"
+            skipped += 1
+        else:
+            verdict = "ok"
+        print(f"{verdict:8} {label:38} {small:>3} statements @ {small_rows:>2} rows, "
+              f"{large:>3} @ {large_rows:>2} rows (budget {budget})")
+
+    if skipped:
+        print(f"\n{skipped} endpoints had too few rows to compare page sizes; seed more with --seed")
+    if failures:
+        print(f"\n{failures} endpoints run more statements than their budget or grow with page size")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
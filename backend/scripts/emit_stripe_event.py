@@ -0,0 +1,82 @@
+"""Send a signed, Stripe-style webhook event to the local API.
+
+Stands in for Stripe when testing payment fulfillment offline: builds a
+`payment_intent.succeeded` (or other) event, signs it with
+STRIPE_WEBHOOK_SECRET exactly as Stripe does (`t=...,v1=HMAC-SHA256`), and
+POSTs it to /api/v1/payments/webhook. Re-running with the same --event-id
+exercises duplicate delivery.
+
+Usage:
+    STRIPE_WEBHOOK_SECRET=whsec_test python scripts/emit_stripe_event.py \\
+        --intent-id pi_test_1 --user-id 3 --course-id 7
+    python scripts/emit_stripe_event.py --intent-id pi_test_2 --user-id 3 --booking-id 12 --event-id evt_dup
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+import urllib.error
+import urllib.request
+
+
+def sign(payload: bytes, secret: str, timestamp: int) -> str:
+    signed = f"{timestamp}.".encode() + payload
+    signature = hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def build_event(args) -> dict:
+    return {
+        "id": args.event_id or f"evt_fake_{secrets.token_hex(8)}",
+        "object": "event",
+        "type": args.type,
+        "created": int(time.time()),
+        "data": {
+            "object": {
+                "id": args.intent_id,
+                "object": "payment_intent",
+                "status": "succeeded" if args.type == "payment_intent.succeeded" else "requires_payment_method",
+                "metadata": {
+                    "user_id": str(args.user_id),
+                    "booking_id": str(args.booking_id or ""),
+                    "course_id": str(args.course_id or ""),
+                },
+            }
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--secret", default=os.getenv("STRIPE_WEBHOOK_SECRET", ""))
+    parser.add_argument("--type", default="payment_intent.succeeded")
+    parser.add_argument("--event-id", help="fixed event id (default: random)")
+    parser.add_argument("--intent-id", required=True)
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--booking-id", type=int)
+    parser.add_argument("--course-id", type=int)
+    args = parser.parse_args()
+
+    if not args.secret:
+        parser.error("--secret or STRIPE_WEBHOOK_SECRET is required")
+
+    payload = json.dumps(build_event(args)).encode()
+    request = urllib.request.Request(
+        f"{args.base_url}/api/v1/payments/webhook",
+        data=payload,
+        headers={"Content-Type": "application/json", "Stripe-Signature": sign(payload, args.secret, int(time.time()))},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            print(response.status, response.read().decode())
+    except urllib.error.HTTPError as exc:
+        print(exc.code, exc.read().decode())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""EXPLAIN the routers' hot queries and fail if any still needs a sequential scan.
+
+Sequential scans are disabled for the session, so Postgres only picks one
+when no index can serve the query. Run against a migrated database
+(`alembic upgrade head`); seeded data makes the plans more realistic but is
+not required.
+
+Usage (inside the backend container):
+    python scripts/explain_queries.py
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, text, tuple_  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.models import (  # noqa: E402
+    Booking, CommunityPost, CommunityReply, Course, CourseEnrollment,
+    MentorAvailability, MentorProfile, MentorStatus, User
+)
+
+# Label -> statement mirroring a router query
+QUERIES = {
+    "bookings.get_my_bookings": select(Booking).where(Booking.user_id == 1).order_by(Booking.scheduled_at.desc()),
+    "bookings.get_mentor_bookings": select(Booking).where(Booking.mentor_id == 1).order_by(Booking.scheduled_at.desc()),
+    "bookings.list_approved_mentors": select(MentorProfile).where(MentorProfile.status == MentorStatus.APPROVED).limit(100),
+    "bookings.get_mentor_availability": select(MentorAvailability).where(
+        MentorAvailability.mentor_id == 1, MentorAvailability.is_available == True
+    ),
+    "courses.list_courses": select(Course).where(Course.is_published == True).order_by(
+        Course.created_at.desc(), Course.id.desc()
+    ).limit(100),
+    "courses.get_my_courses": select(Course).where(Course.instructor_id == 1),
+    "courses.enroll_in_course": select(CourseEnrollment).where(
+        CourseEnrollment.user_id == 1, CourseEnrollment.course_id == 1
+    ),
+    "courses.get_my_enrollments": select(CourseEnrollment).where(CourseEnrollment.user_id == 1),
+    "community.list_posts": select(CommunityPost).order_by(
+        CommunityPost.created_at.desc(), CommunityPost.id.desc()
+    ).limit(100),
+    "community.list_posts(group)": select(CommunityPost).where(CommunityPost.group_id == 1).order_by(
+        CommunityPost.created_at.desc(), CommunityPost.id.desc()
+    ).limit(100),
+    "community.list_posts(cursor)": select(CommunityPost).where(
+        tuple_(CommunityPost.created_at, CommunityPost.id) < tuple_(text("now()"), text("1000"))
+    ).order_by(CommunityPost.created_at.desc(), CommunityPost.id.desc()).limit(100),
+    "community.list_post_replies": select(CommunityReply).where(CommunityReply.post_id == 1).order_by(
+        CommunityReply.created_at.asc(), CommunityReply.id.asc()
+    ).limit(100),
+    "admin.list_pending_mentors": select(MentorProfile).where(MentorProfile.status == MentorStatus.PENDING).limit(100),
+    "admin.list_all_users(cursor)": select(User).order_by(User.created_at.desc(), User.id.desc()).limit(100),
+    "admin.list_all_bookings": select(Booking).order_by(Booking.created_at.desc(), Booking.id.desc()).limit(100),
+    "auth.login": select(User).where(User.email == "someone@talesoul.com"),
+}
+
+
+def find_seq_scans(plan):
+    """Yield relation names of Seq Scan nodes in a JSON plan tree"""
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan.get("Relation Name")
+    for child in plan.get("Plans", []):
+        yield from find_seq_scans(child)
+
+
+def main():
+    failures = []
+    with engine.connect() as connection:
+        connection.execute(text("SET enable_seqscan = off"))
+        for label, statement in QUERIES.items():
+            compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+            result = connection.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+            plan = (json.loads(result) if isinstance(result, str) else result)[0]["Plan"]
+            scans = list(find_seq_scans(plan))
+            print(f"{'SEQ SCAN' if scans else 'ok':8} {label} {', '.join(scans)}")
+            if scans:
+                failures.append(label)
+
+    if failures:
+        print(f"\n{len(failures)} queries need a sequential scan")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Concurrent load test for the TaleSoul API.
+
+Runs each endpoint on its own first, then mixes them under the same
+concurrency, and prints per-endpoint latency for both runs. If a slow handler
+(bcrypt in /auth/login) blocked the event loop, the fast endpoints would
+inherit its latency in the mixed run.
+
+Usage:
+    python scripts/loadtest.py --base-url http://localhost:8000 \\
+        --email admin@talesoul.com --password admin123 \\
+        --concurrency 20 --requests 200
+"""
+import argparse
+import json
+import statistics
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def http_request(method, url, data=None, headers=None):
+    """Send a request and return the response status code"""
+    request = urllib.request.Request(url, data=data, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def login_call(args):
+    body = urllib.parse.urlencode({"username": args.email, "password": args.password}).encode()
+    return lambda: http_request(
+        "POST", f"{args.base_url}/api/v1/auth/login", body,
+        {"Content-Type": "application/x-www-form-urlencoded"}
+    )
+
+
+def get_call(path):
+    return lambda args: (lambda: http_request("GET", f"{args.base_url}{path}"))
+
+
+# Endpoint label -> factory returning a zero-argument request function
+ENDPOINTS = {
+    "auth/login": login_call,
+    "courses": get_call("/api/v1/courses/"),
+    "bookings/mentors": get_call("/api/v1/bookings/mentors"),
+    "community/posts": get_call("/api/v1/community/posts"),
+}
+
+# Scenario name -> endpoints that run together in the mixed phase
+SCENARIOS = {
+    "login-vs-courses": ["auth/login", "courses"],
+    # Endpoints served by the AsyncSession dependency; compare `_rps` against
+    # a build that still serves them from the sync threadpool
+    "async-reads": ["courses", "bookings/mentors", "community/posts"],
+}
+
+
+def run_phase(calls, total, concurrency):
+    """Run `total` requests round-robin over `calls`; return latencies per label"""
+    latencies = {label: [] for label, _ in calls}
+    errors = {label: 0 for label, _ in calls}
+
+    def one(i):
+        label, call = calls[i % len(calls)]
+        start = time.perf_counter()
+        status_code = call()
+        return label, time.perf_counter() - start, status_code
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for label, elapsed, status_code in pool.map(one, range(total)):
+            latencies[label].append(elapsed)
+            if status_code >= 400:
+                errors[label] += 1
+    wall = time.perf_counter() - started
+    return latencies, errors, wall
+
+
+def summarize(latencies, errors, wall):
+    result = {}
+    for label, values in latencies.items():
+        if not values:
+            continue
+        values = sorted(values)
+        result[label] = {
+            "requests": len(values),
+            "errors": errors[label],
+            "p50_ms": round(statistics.median(values) * 1000, 1),
+            "p95_ms": round(values[int(len(values) * 0.95) - 1] * 1000, 1),
+            "max_ms": round(values[-1] * 1000, 1),
+        }
+    total = sum(len(v) for v in latencies.values())
+    result["_rps"] = round(total / wall, 1) if wall else 0.0
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="admin@talesoul.com")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="login-vs-courses")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    labels = SCENARIOS[args.scenario]
+    calls = {label: ENDPOINTS[label](args) for label in labels}
+
+    report = {"isolated": {}, "mixed": {}}
+    for label in labels:
+        report["isolated"][label] = summarize(*run_phase([(label, calls[label])], args.requests, args.concurrency))
+    report["mixed"] = summarize(*run_phase(list(calls.items()), args.requests * len(labels), args.concurrency))
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
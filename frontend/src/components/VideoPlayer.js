@@ -1,4 +1,5 @@
 import React, { useRef, useEffect, useState } from 'react';
+import Hls from 'hls.js';
 import './VideoPlayer.css';
 
 const VideoPlayer = ({ videoUrl, onProgress }) => {
@@ -10,6 +11,22 @@ const VideoPlayer = ({ videoUrl, onProgress }) => {
   const [duration, setDuration] = useState(0);
   const [currentTime, setCurrentTime] = useState(0);
 
+  // HLS manifests play natively in Safari; elsewhere hls.js feeds the
+  // adaptive renditions through Media Source Extensions
+  useEffect(() => {
+    const video = videoRef.current;
+    if (!video || !videoUrl) return;
+
+    if (videoUrl.includes('.m3u8') && !video.canPlayType('application/vnd.apple.mpegurl') && Hls.isSupported()) {
+      const hls = new Hls();
+      hls.loadSource(videoUrl);
+      hls.attachMedia(video);
+      return () => hls.destroy();
+    }
+
+    video.src = videoUrl;
+  }, [videoUrl]);
+
   useEffect(() => {
     const video = videoRef.current;
     if (!video) return;
@@ -103,7 +120,7 @@ const VideoPlayer = ({ videoUrl, onProgress }) => {
       <video
         ref={videoRef}
         className="video-element"
-        src={videoUrl}
+        preload="metadata"
         onClick={togglePlay}
       />
 
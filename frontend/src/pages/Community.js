@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import api from '../services/api';
+import api, { resizedImage } from '../services/api';
 import './Community.css';
 
 const Community = () => {
@@ -134,7 +134,7 @@ const Community = () => {
                     <div className="post-author">
                       <div className="author-avatar">
                         {post.author?.profile_picture ? (
-                          <img src={post.author.profile_picture} alt={post.author.full_name} />
+                          <img src={resizedImage(post.author.profile_picture, 64)} alt={post.author.full_name} />
                         ) : (
                           <div className="avatar-placeholder">
                             {post.author?.full_name?.charAt(0).toUpperCase()}
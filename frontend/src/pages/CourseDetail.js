@@ -1,7 +1,7 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
-import api from '../services/api';
+import api, { coursesAPI, resizedImage } from '../services/api';
 import VideoPlayer from '../components/VideoPlayer';
 import './CourseDetail.css';
 
@@ -15,6 +15,9 @@ const CourseDetail = () => {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [purchasing, setPurchasing] = useState(false);
+  const [streamUrl, setStreamUrl] = useState(null);
+  // One key per visit, so double clicks and retries reuse the same PaymentIntent
+  const purchaseKey = useRef(`course-${courseId}-${Date.now()}-${Math.random().toString(36).slice(2)}`);
 
   useEffect(() => {
     fetchCourseDetails();
@@ -23,6 +26,12 @@ const CourseDetail = () => {
     }
   }, [courseId, isAuthenticated]);
 
+  useEffect(() => {
+    if (enrollment && course?.video_url) {
+      fetchStreamUrl();
+    }
+  }, [enrollment, course]);
+
   const fetchCourseDetails = async () => {
     try {
       setLoading(true);
@@ -46,6 +55,17 @@ const CourseDetail = () => {
     }
   };
 
+  // One access check per viewing session; the player's range requests
+  // (seeking, buffering) go straight to the signed URL
+  const fetchStreamUrl = async () => {
+    try {
+      const response = await coursesAPI.getStreamUrl(courseId);
+      setStreamUrl(response.data.url);
+    } catch (err) {
+      console.error('Failed to get video stream:', err);
+    }
+  };
+
   const handlePurchase = async () => {
     if (!isAuthenticated) {
       navigate('/login');
@@ -58,17 +78,29 @@ const CourseDetail = () => {
       // Create payment intent
       const paymentResponse = await api.post('/api/v1/payments/create-payment-intent', {
         course_id: parseInt(courseId)
+      }, {
+        headers: { 'Idempotency-Key': purchaseKey.current }
       });
 
       // In a real implementation, you would integrate with Stripe Elements here
       // For now, we'll simulate a successful payment
       alert(`Payment intent created: ${paymentResponse.data.client_secret}`);
 
-      // Confirm payment (in real app, this would happen after Stripe confirms)
-      await api.post('/api/v1/payments/confirm-payment', {
-        payment_intent_id: paymentResponse.data.payment_intent_id,
-        course_id: parseInt(courseId)
-      });
+      // The Stripe webhook enrolls us; poll until it has (202 = still pending)
+      let confirmResponse;
+      for (let attempt = 0; attempt < 10; attempt++) {
+        confirmResponse = await api.post('/api/v1/payments/confirm-payment', {
+          payment_intent_id: paymentResponse.data.payment_intent_id,
+          course_id: parseInt(courseId)
+        });
+        if (confirmResponse.status !== 202) break;
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+      }
+
+      if (confirmResponse.status === 202) {
+        alert('Payment is still processing. Your enrollment will appear shortly.');
+        return;
+      }
 
       alert('Course purchased successfully!');
       window.location.reload(); // Reload to show enrolled status
@@ -104,7 +136,7 @@ const CourseDetail = () => {
         <div className="enrolled-course">
           <div className="video-section">
             <VideoPlayer
-              videoUrl={course.video_url}
+              videoUrl={streamUrl}
               onProgress={updateProgress}
             />
           </div>
@@ -125,7 +157,7 @@ const CourseDetail = () => {
       <div className="course-info-section">
         <div className="course-header">
           {course.thumbnail_url && (
-            <img src={course.thumbnail_url} alt={course.title} className="course-banner" />
+            <img src={resizedImage(course.thumbnail_url, 1280)} alt={course.title} className="course-banner" />
           )}
 
           <div className="course-title-section">
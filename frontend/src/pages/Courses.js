@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import api from '../services/api';
+import api, { resizedImage } from '../services/api';
 import './Courses.css';
 
 const Courses = () => {
@@ -73,7 +73,7 @@ const Courses = () => {
             <div key={course.id} className="course-card">
               <div className="course-thumbnail">
                 {course.thumbnail_url ? (
-                  <img src={course.thumbnail_url} alt={course.title} />
+                  <img src={resizedImage(course.thumbnail_url, 640)} alt={course.title} />
                 ) : (
                   <div className="thumbnail-placeholder">
                     <span>📚</span>
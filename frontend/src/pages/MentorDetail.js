@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
-import api from '../services/api';
+import api, { resizedImage } from '../services/api';
 import './MentorDetail.css';
 
 const MentorDetail = () => {
@@ -115,7 +115,7 @@ const MentorDetail = () => {
         <div className="profile-header">
           <div className="profile-avatar">
             {mentor.user?.profile_picture ? (
-              <img src={mentor.user.profile_picture} alt={mentor.user.full_name} />
+              <img src={resizedImage(mentor.user.profile_picture, 256)} alt={mentor.user.full_name} />
             ) : (
               <div className="avatar-placeholder-large">
                 {mentor.user?.full_name?.charAt(0).toUpperCase()}
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
-import api from '../services/api';
+import api, { resizedImage } from '../services/api';
 import './Mentors.css';
 
 const Mentors = () => {
@@ -73,7 +73,7 @@ const Mentors = () => {
             <div key={mentor.id} className="mentor-card">
               <div className="mentor-avatar">
                 {mentor.user?.profile_picture ? (
-                  <img src={mentor.user.profile_picture} alt={mentor.user.full_name} />
+                  <img src={resizedImage(mentor.user.profile_picture, 256)} alt={mentor.user.full_name} />
                 ) : (
                   <div className="avatar-placeholder">
                     {mentor.user?.full_name?.charAt(0).toUpperCase()}
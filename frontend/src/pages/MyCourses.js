@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useAuth } from '../context/AuthContext';
 import { useNavigate } from 'react-router-dom';
-import api from '../services/api';
+import api, { resizedImage } from '../services/api';
 import './MyCourses.css';
 
 const MyCourses = () => {
@@ -237,7 +237,7 @@ const MyCourses = () => {
             <div key={course.id} className="course-item">
               <div className="course-thumbnail-preview">
                 {course.thumbnail_url ? (
-                  <img src={course.thumbnail_url} alt={course.title} />
+                  <img src={resizedImage(course.thumbnail_url, 640)} alt={course.title} />
                 ) : (
                   <div className="thumbnail-placeholder">No thumbnail</div>
                 )}
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import { useAuth } from '../context/AuthContext';
-import api from '../services/api';
+import api, { resizedImage } from '../services/api';
 import './PostDetail.css';
 
 const PostDetail = () => {
@@ -111,7 +111,7 @@ const PostDetail = () => {
             <div className="author-info">
               <div className="author-avatar">
                 {post.author?.profile_picture ? (
-                  <img src={post.author.profile_picture} alt={post.author.full_name} />
+                  <img src={resizedImage(post.author.profile_picture, 64)} alt={post.author.full_name} />
                 ) : (
                   <div className="avatar-placeholder">
                     {post.author?.full_name?.charAt(0).toUpperCase()}
@@ -160,7 +160,7 @@ const PostDetail = () => {
                 <div className="reply-author">
                   <div className="author-avatar-small">
                     {reply.author?.profile_picture ? (
-                      <img src={reply.author.profile_picture} alt={reply.author.full_name} />
+                      <img src={resizedImage(reply.author.profile_picture, 64)} alt={reply.author.full_name} />
                     ) : (
                       <div className="avatar-placeholder">
                         {reply.author?.full_name?.charAt(0).toUpperCase()}
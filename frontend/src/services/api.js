@@ -48,6 +48,7 @@ export const coursesAPI = {
   createCourse: (courseData) => api.post('/courses', courseData),
   enrollInCourse: (enrollmentData) => api.post('/courses/enroll', enrollmentData),
   getMyEnrollments: () => api.get('/courses/my-enrollments'),
+  getStreamUrl: (id) => api.post(`/courses/${id}/stream-token`),
 };
 
 // Community API
@@ -70,4 +71,10 @@ export const adminAPI = {
   getAllUsers: (params) => api.get('/admin/users', { params }),
 };
 
+// Resized copy of an uploaded image (format negotiated by the browser's Accept header)
+export const resizedImage = (src, width) =>
+  src && src.startsWith('/uploads/')
+    ? `${API_BASE_URL}/media/image?src=${encodeURIComponent(src)}&w=${width}`
+    : src;
+
 export default api;